@@ -0,0 +1,204 @@
+"""
+benchmark of the disambiguation algorithms of part 3, 4 and 6 on a fixed sample of the MSH-WSD dataset
+example : python benchmark.py --terms 5 --acronyms 5 --output results.json
+the results can be compared between machines and commits because the sample only depends on the seed
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+importStart = time.perf_counter()
+import pywsd
+from pywsd import lesk as l
+from pywsd import baseline as base
+from pywsd import instrumentation
+from pywsd.lexicon_snapshot import SnapshotWordNet
+from pywsd.similarity import clear_similarity_cache, similarity_cache_info, max_similarity as maxsim
+from pywsd.utils import clear_lemma_cache, lemma_cache_info
+from phonetic import newMaxSimilarity
+importSeconds = time.perf_counter() - importStart
+
+from dataset import PackedCorpus, Word, getWordnameFromPath, getfileListFromDirectory
+
+# algorithms of part 3, 4 and 6, each one is called with the sentence and the ambiguous word
+ALGORITHMS = {
+    "original_lesk": l.original_lesk,
+    "adapted_lesk": l.adapted_lesk,
+    "simple_lesk": l.simple_lesk,
+    "cosine_lesk": l.cosine_lesk,
+    "max_similarity_path": lambda sentence, word: maxsim(sentence, word, option="path"),
+    "max_similarity_resnik": lambda sentence, word: maxsim(sentence, word, option="resnik"),
+    "max_lemma_count": lambda sentence, word: base.max_lemma_count(word),
+    "new_max_similarity": newMaxSimilarity,
+}
+
+
+def getPeakMemory():
+    """
+    get the peak resident memory of the process since it started
+    :return: float of the peak in megabytes, None if it can't be measured
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def getCommit():
+    """
+    get the git commit of the project
+    :return: string of the commit hash, None if it is not a git repository
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def selectSample(candidates, numberOfTerms: int, numberOfAcronyms: int, seed: int):
+    """
+    select the same words for every run with the same seed
+    :param candidates: dictionary of the lists of words or paths keyed by their directory ("terms" or "acronyms")
+    :param numberOfTerms: number of terms selected
+    :param numberOfAcronyms: number of acronyms selected
+    :param seed: integer of the seed of the selection
+    :return: list of the selected words or paths
+    """
+    generator = random.Random(seed)
+    sample = []
+    for directory, number in (("terms", numberOfTerms), ("acronyms", numberOfAcronyms)):
+        # sorted by the ambiguous word so a packed dataset gives the same sample as the directories
+        directoryCandidates = sorted(candidates[directory],
+                                     key=lambda word: getWordnameFromPath(word) if isinstance(word, str) else word.word)
+        sample.extend(generator.sample(directoryCandidates, min(number, len(directoryCandidates))))
+    return sample
+
+
+def benchmarkAlgorithm(algorithm, sample, maxExamples: int):
+    """
+    run an algorithm on the examples of the sample and measure the time of each example
+    :param algorithm: the function of the algorithm
+    :param sample: list of the words of the sample
+    :param maxExamples: maximum number of examples used for each word
+    :return: dictionary of the measures
+    """
+    latencies = []
+    start = time.perf_counter()
+    for word in sample:
+        for index, example in enumerate(word.examples):
+            if index == maxExamples:
+                break
+            exampleStart = time.perf_counter()
+            algorithm(example.sentence, word.word)
+            latencies.append(time.perf_counter() - exampleStart)
+    seconds = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (None, None, None)
+    return {"examples": len(latencies),
+            "seconds": seconds,
+            "examplesPerSecond": len(latencies) / seconds if seconds else None,
+            "latencyMs": {"mean": float(latencies.mean()) if len(latencies) else None,
+                          "p50": p50, "p95": p95, "p99": p99}}
+
+
+def runBenchmark(sample, algorithms, maxExamples: int, stages: bool = False, lemmaCache: bool = False):
+    """
+    run the benchmark of several algorithms on the same sample
+    :param sample: list of the words of the sample
+    :param algorithms: list of the names of the algorithms inside ALGORITHMS
+    :param maxExamples: maximum number of examples used for each word
+    :param stages: boolean to also record the calls and the time of each stage of pywsd for each algorithm
+    :param lemmaCache: boolean to use the lemma cache file of pywsd, the lemmas of the previous runs make the
+    algorithms faster so the timings are only comparable between runs with the same file
+    :return: dictionary of the results which can be written as json
+    """
+    if not lemmaCache:
+        # without the file every algorithm lemmatizes its words itself, whatever the order and the previous runs
+        pywsd.utils.lemma_cache_path = None
+    # pywsd loads its resources lazily, so the first algorithm would pay for the resources of the others
+    warmUpStart = time.perf_counter()
+    pywsd.warm_up()
+    warmUpSeconds = time.perf_counter() - warmUpStart
+    warmUpPeakRssMb = getPeakMemory()
+
+    results = {}
+    for name in algorithms:
+        print(f"benchmark of {name}...", file=sys.stderr, flush=True)
+        if stages:
+            instrumentation.reset()
+            instrumentation.enable()
+        # every algorithm starts with an empty cache so the order of the algorithms doesn't matter
+        clear_similarity_cache()
+        clear_lemma_cache()
+        results[name] = benchmarkAlgorithm(ALGORITHMS[name], sample, maxExamples)
+        results[name]["similarityCache"] = similarity_cache_info()._asdict()
+        results[name]["lemmaCache"] = lemma_cache_info()._asdict()
+        if stages:
+            instrumentation.disable()
+            results[name]["stages"] = instrumentation.report()
+        if results[name]["examples"]:
+            print(f"{name} : {results[name]['examplesPerSecond']:.2f} examples/s, "
+                  f"p50 {results[name]['latencyMs']['p50']:.1f} ms", file=sys.stderr)
+    return {"commit": getCommit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "machine": {"platform": platform.platform(), "processor": platform.processor(),
+                        "python": platform.python_version()},
+            "importSeconds": importSeconds,
+            "warmUpSeconds": warmUpSeconds,
+            # peaks of the whole process, the peak of an algorithm can't be told apart from the ones before it
+            "warmUpPeakRssMb": warmUpPeakRssMb,
+            "peakRssMb": getPeakMemory(),
+            "lexicon": type(pywsd.get_wordnet()).__name__,
+            "maxExamples": maxExamples,
+            "lemmaCacheFile": pywsd.utils.lemma_cache_path,
+            "sample": [word.word for word in sample],
+            "algorithms": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark the disambiguation algorithms on MSH-WSD")
+    parser.add_argument("--terms", type=int, default=5, help="number of terms of the sample")
+    parser.add_argument("--acronyms", type=int, default=5, help="number of acronyms of the sample")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the selection of the sample")
+    parser.add_argument("--max-examples", type=int, default=20, help="maximum number of examples for each word")
+    parser.add_argument("--algorithms", nargs="+", choices=list(ALGORITHMS), default=list(ALGORITHMS),
+                        help="algorithms to run, all of them by default")
+    parser.add_argument("--dataset", help="packed dataset file to use instead of the terms and acronyms directories")
+    parser.add_argument("--wordnet", help="compiled WordNet snapshot to use instead of the default WordNet of pywsd")
+    parser.add_argument("--stages", action="store_true",
+                        help="record the time of each stage of pywsd, it slows down the algorithms a little")
+    parser.add_argument("--lemma-cache", action="store_true",
+                        help="use the lemma cache file of pywsd, the timings then depend on the previous runs")
+    parser.add_argument("--output", help="path of the json file to write, printed if not given")
+    arguments = parser.parse_args()
+
+    if arguments.wordnet:
+        pywsd.set_wordnet(SnapshotWordNet(arguments.wordnet))
+    if arguments.dataset:
+        packedCorpus = PackedCorpus(arguments.dataset)
+        candidates = {directory: packedCorpus.select(directory) for directory in ("terms", "acronyms")}
+        sample = selectSample(candidates, arguments.terms, arguments.acronyms, arguments.seed)
+    else:
+        candidates = {directory: getfileListFromDirectory(directory) for directory in ("terms", "acronyms")}
+        sample = [Word(path) for path in selectSample(candidates, arguments.terms, arguments.acronyms, arguments.seed)]
+    results = runBenchmark(sample, arguments.algorithms, arguments.max_examples, arguments.stages,
+                           arguments.lemma_cache)
+
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            json.dump(results, output, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,473 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+# regex to represent the tag < > around the ambiguous word
+TAG_REGEX = re.compile(r'<[^>]+>')
+# regex to find the header line giving the amount of meaning
+CLASS_ATTRIBUTE_REGEX = re.compile(r'(.*)@ATTRIBUTE class(.*)')
+# regex to split a line on everything which is not a digit
+NON_DIGIT_REGEX = re.compile(r'[^0-9]')
+# regex to find the line after which the examples begin
+DATA_REGEX = re.compile(r'\s*@DATA', re.IGNORECASE)
+
+# first bytes of a packed dataset file, followed by the length of its json header
+PACKED_MAGIC = b"MSHWSDP1"
+PACKED_HEADER_STRUCT = struct.Struct("<8sQ")
+
+
+# function to remove tags from a string
+def removeTags(line: str):
+    return TAG_REGEX.sub('', line)
+
+
+class Example():
+    """
+    class which associate a sentence and a meaning number according to the dataset
+    sentence : string of a sentence where the example word is used
+    meaning : an integer which corresponds to the meaning number at the end of the example in the dataset
+    """
+    __slots__ = ("sentence", "meaning")
+
+    def __init__(self, sentence: str, meaning: int):
+        self.sentence = sentence
+        self.meaning = meaning
+
+
+class Word():
+    """
+    class which parse a file to be understandable and usable by our program
+    path : string of the path of the file
+    word : string of the ambiguous word
+    examples : list of Example objects
+    meaningNumber : integer which represents amount of meaning associated with the word
+    """
+    __slots__ = ("path", "word", "examples", "meaningNumber")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.word = self.getWordnameFromFilename()
+        self.examples = []
+        self.meaningNumber = -1
+        self.parseFileToArray()
+
+    def getWordnameFromFilename(self):
+        """
+        get the string of the word from the name of the file
+        :return: the string of the word
+        """
+        return getWordnameFromPath(self.path)
+
+    def parseLineToExample(self, line: str):
+        """
+        parse each line inside an Example object
+        :param line: string of a line from a file of the dataset
+        :return: an Example Object of the line parsed
+        """
+        return parseLineToExample(line)
+
+    def parseFileToArray(self):
+        """
+        parse the whole file to a Word object
+        :return: nothing
+        """
+        # the same parser as StreamedWord, so both give the same examples
+        self.meaningNumber = readMeaningNumber(self.path)
+        self.examples = list(readExamples(self.path))
+
+
+class StreamedWord():
+    """
+    class which read a file lazily, without keeping its examples in memory
+    path : string of the path of the file
+    word : string of the ambiguous word
+    meaningNumber : integer which represents amount of meaning associated with the word, read from the header
+    examples : generator of Example objects, the file is read again each time it is accessed
+    """
+    __slots__ = ("path", "word", "meaningNumber")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.word = getWordnameFromPath(path)
+        self.meaningNumber = readMeaningNumber(path)
+
+    @property
+    def examples(self):
+        return readExamples(self.path)
+
+
+class Corpus():
+    """
+    class which parse every file of the dataset only once and keep the Word objects in memory
+    words : dictionary of Word objects keyed by the path of their file, several files can have the same word
+    """
+    __slots__ = ("words",)
+
+    def __init__(self, listOfFiles=()):
+        self.words = {}
+        for path in listOfFiles:
+            self.add(path)
+
+    @classmethod
+    def fromDirectories(cls, *directoryPaths: str):
+        """
+        build a corpus with all the files inside the directories
+        :param directoryPaths: strings of the paths to the directories (ex : "acronyms", "terms")
+        :return: a Corpus object
+        """
+        files = []
+        for directoryPath in directoryPaths:
+            files.extend(getfileListFromDirectory(directoryPath))
+        return cls(files)
+
+    def add(self, path: str):
+        """
+        parse a file and add it to the corpus
+        :param path: string of the path of the file
+        :return: the Word object parsed
+        """
+        word = Word(path)
+        self.words[path] = word
+        return word
+
+    def __getitem__(self, key: str):
+        """
+        get a Word object by the path of its file, or by its ambiguous word when only one file has it
+        :param key: string of the path of the file or of the word
+        :return: the Word object
+        """
+        if key in self.words:
+            return self.words[key]
+        words = [word for word in self.words.values() if word.word == key]
+        if len(words) != 1:
+            raise KeyError(key if not words else f"{len(words)} files have the word {key}, use the path of one")
+        return words[0]
+
+    def __contains__(self, key: str):
+        return key in self.words or any(word.word == key for word in self.words.values())
+
+    def __iter__(self):
+        return iter(self.words.values())
+
+    def __len__(self):
+        return len(self.words)
+
+
+class PackedWord():
+    """
+    class which gives the examples of a word stored inside a packed dataset file without parsing anything
+    corpus : the PackedCorpus object which holds the memory mapped file
+    path : string of the path of the original file of the dataset
+    word : string of the ambiguous word
+    meaningNumber : integer which represents amount of meaning associated with the word
+    first : integer of the index of the first example of the word inside the packed file
+    count : integer of the amount of examples of the word
+    """
+    __slots__ = ("corpus", "path", "word", "meaningNumber", "first", "count")
+
+    def __init__(self, corpus, path: str, word: str, meaningNumber: int, first: int, count: int):
+        self.corpus = corpus
+        self.path = path
+        self.word = word
+        self.meaningNumber = meaningNumber
+        self.first = first
+        self.count = count
+
+    def __reduce__(self):
+        # the memory mapped file can't be sent to another process, so it is mapped again there by its path
+        return loadPackedWord, (self.corpus.path, self.path)
+
+    @property
+    def meanings(self):
+        """
+        numpy array of the meaning numbers of the examples, it is a view on the memory mapped file
+        """
+        return self.corpus.meanings[self.first:self.first + self.count]
+
+    def getContentHash(self):
+        """
+        get a hash of the examples of the word, read directly from the memory mapped file
+        :return: string of the hexadecimal sha256 digest
+        """
+        offsets = self.corpus.offsets[self.first:self.first + self.count + 1]
+        content = hashlib.sha256(f"{self.word} {self.meaningNumber}".encode("utf-8"))
+        content.update(self.meanings.tobytes())
+        content.update(np.diff(offsets).tobytes())
+        content.update(self.corpus.text[offsets[0]:offsets[-1]])
+        return content.hexdigest()
+
+    @property
+    def examples(self):
+        """
+        generator of Example objects, each sentence is decoded from the memory mapped file only when it is reached
+        """
+        meanings = self.meanings
+        for i in range(self.count):
+            yield Example(self.corpus.getSentence(self.first + i), int(meanings[i]))
+
+
+class PackedCorpus():
+    """
+    class which memory map a dataset file written by packCorpus, it can be used like a Corpus object
+    path : string of the path of the packed file
+    buffer : the mmap object of the whole file
+    meanings : numpy array of the meaning number of every example
+    offsets : numpy array of the position of every sentence inside text, with one more value for the end
+    text : memoryview of the utf-8 encoded sentences of every example
+    words : dictionary of PackedWord objects keyed by the path of their original file, several files can have the same word
+    """
+    __slots__ = ("path", "buffer", "meanings", "offsets", "text", "words")
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, headerLength = PACKED_HEADER_STRUCT.unpack_from(self.buffer, 0)
+        if magic != PACKED_MAGIC:
+            raise ValueError(f"{path} is not a packed dataset file")
+        headerStart = PACKED_HEADER_STRUCT.size
+        header = json.loads(self.buffer[headerStart:headerStart + headerLength].decode("utf-8"))
+        dataStart = alignTo8(headerStart + headerLength)
+
+        exampleNumber = header["exampleNumber"]
+        self.meanings = np.frombuffer(self.buffer, dtype=np.uint8, count=exampleNumber,
+                                      offset=dataStart + header["meaningsOffset"])
+        self.offsets = np.frombuffer(self.buffer, dtype="<i8", count=exampleNumber + 1,
+                                     offset=dataStart + header["offsetsOffset"])
+        textStart = dataStart + header["textOffset"]
+        self.text = memoryview(self.buffer)[textStart:textStart + int(self.offsets[-1])]
+
+        self.words = {}
+        for filePath, word, meaningNumber, first, count in header["words"]:
+            self.words[filePath] = PackedWord(self, filePath, word, meaningNumber, first, count)
+
+    def getSentence(self, index: int):
+        """
+        decode the sentence of an example
+        :param index: integer of the index of the example inside the packed file
+        :return: the string of the sentence
+        """
+        return str(self.text[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+    def select(self, directoryPath: str):
+        """
+        get the words which come from a directory of the original dataset
+        :param directoryPath: string of the path to the directory (ex : "acronyms", "terms")
+        :return: a list of PackedWord objects
+        """
+        directoryPath = os.path.normpath(directoryPath) + os.sep
+        return [word for word in self.words.values() if os.path.normpath(word.path).startswith(directoryPath)]
+
+    def __getitem__(self, key: str):
+        """
+        get a PackedWord object by the path of its original file, or by its ambiguous word when only one file has it
+        :param key: string of the path of the original file or of the word
+        :return: the PackedWord object
+        """
+        if key in self.words:
+            return self.words[key]
+        words = [word for word in self.words.values() if word.word == key]
+        if len(words) != 1:
+            raise KeyError(key if not words else f"{len(words)} files have the word {key}, use the path of one")
+        return words[0]
+
+    def __contains__(self, key: str):
+        return key in self.words or any(word.word == key for word in self.words.values())
+
+    def __iter__(self):
+        return iter(self.words.values())
+
+    def __len__(self):
+        return len(self.words)
+
+
+# PackedCorpus objects already opened by loadPackedWord, keyed by the path of the packed file
+openedPackedCorpora = {}
+
+
+def loadPackedWord(path: str, filePath: str):
+    """
+    get a word from a packed file, the file is memory mapped only once per process
+    :param path: string of the path of the packed file
+    :param filePath: string of the path of the original file of the word
+    :return: a PackedWord object
+    """
+    if path not in openedPackedCorpora:
+        openedPackedCorpora[path] = PackedCorpus(path)
+    return openedPackedCorpora[path].words[filePath]
+
+
+def getWordnameFromPath(path: str):
+    """
+    get the string of the word from the name of a file
+    :param path: string of the path of the file
+    :return: the string of the word
+    """
+    filename = os.path.basename(path)
+    filename = os.path.splitext(filename)
+    word = filename[0].split('_')
+    return word[0]
+
+
+def parseMeaningNumber(line: str):
+    """
+    get the amount of meaning from the @ATTRIBUTE class line of a file
+    :param line: string of the header line
+    :return: integer of the amount of meaning
+    """
+    return int(max([e for e in NON_DIGIT_REGEX.split(line) if e != ''], key=int))
+
+
+def parseLineToExample(line: str):
+    """
+    parse a line of a file of the dataset inside an Example object
+    :param line: string of a line from a file of the dataset
+    :return: an Example Object of the line parsed
+    """
+    begining = line.index("\"")
+    tempString = line[begining + 1:]
+    meaningNumber = (int)(line[-2:-1])
+    tempString = tempString[:-5]
+    tempString = removeTags(tempString)
+    return Example(tempString, meaningNumber)
+
+
+def readMeaningNumber(path: str):
+    """
+    read only the header of a file to get the amount of meaning
+    :param path: string of the path of the file
+    :return: integer of the amount of meaning, -1 if the header has no @ATTRIBUTE class line
+    """
+    with open(path, "r") as file:
+        for l in file:
+            if CLASS_ATTRIBUTE_REGEX.match(l):
+                return parseMeaningNumber(l)
+            if DATA_REGEX.match(l):
+                break
+    return -1
+
+
+def readExamples(path: str):
+    """
+    generator which read a file line by line and yield its examples one at a time
+    :param path: string of the path of the file
+    :return: a generator of Example objects
+    """
+    with open(path, "r") as file:
+        for l in file:
+            if DATA_REGEX.match(l):
+                break
+        for l in file:
+            if l.strip():
+                yield parseLineToExample(l)
+
+
+def getWord(word, stream: bool = False):
+    """
+    get a parsed Word object from a path, or the object itself if it is already parsed
+    :param word: string of the path of a file or a Word object
+    :param stream: boolean to get a StreamedWord which does not keep the examples in memory
+    :return: a Word object
+    """
+    if isinstance(word, str):
+        return StreamedWord(word) if stream else Word(word)
+    return word
+
+
+def getContentHash(word):
+    """
+    get a hash of the content of a file of the dataset, without parsing it
+    :param word: string of the path of a file, a Word or StreamedWord object, or a PackedWord object
+    :return: string of the hexadecimal sha256 digest
+    """
+    if isinstance(word, PackedWord):
+        return word.getContentHash()
+    path = word if isinstance(word, str) else word.path
+    content = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 16), b""):
+            content.update(block)
+    return content.hexdigest()
+
+
+def getfileListFromDirectory(directoryPath: str):
+    """
+    get the list strings which represent the list of filename from a directory
+    :param directoryPath: string of the path to the directory
+    :return: a list of files path inside it
+    """
+    files = []
+    for r, d, f in os.walk(directoryPath):
+        for file in f:
+            files.append(os.path.join(r, file))
+    return files
+
+
+def alignTo8(position: int):
+    """
+    get the next position which is a multiple of 8, so the numpy arrays of a packed file are aligned
+    :param position: integer of a position inside a file
+    :return: the aligned position
+    """
+    return (position + 7) & ~7
+
+
+def packCorpus(listOfFiles, outputPath: str):
+    """
+    convert files of the dataset into a single packed file which can be memory mapped by PackedCorpus
+    the files are read one example at a time, only the meaning numbers and the offsets are kept in memory
+    :param listOfFiles: list of string of paths
+    :param outputPath: string of the path of the packed file to write
+    :return: the amount of examples written
+    """
+    words = []
+    meanings = []
+    offsets = [0]
+    with tempfile.TemporaryFile() as text:
+        for path in listOfFiles:
+            word = StreamedWord(path)
+            first = len(meanings)
+            for example in word.examples:
+                text.write(example.sentence.encode("utf-8"))
+                offsets.append(text.tell())
+                meanings.append(example.meaning)
+            words.append([path, word.word, word.meaningNumber, first, len(meanings) - first])
+
+        meanings = np.array(meanings, dtype=np.uint8)
+        offsets = np.array(offsets, dtype="<i8")
+        offsetsOffset = alignTo8(meanings.nbytes)
+        textOffset = offsetsOffset + offsets.nbytes
+        header = json.dumps({"exampleNumber": len(meanings), "meaningsOffset": 0, "offsetsOffset": offsetsOffset,
+                             "textOffset": textOffset, "words": words}).encode("utf-8")
+        headerEnd = PACKED_HEADER_STRUCT.size + len(header)
+
+        with open(outputPath, "wb") as output:
+            output.write(PACKED_HEADER_STRUCT.pack(PACKED_MAGIC, len(header)))
+            output.write(header)
+            output.write(b"\0" * (alignTo8(headerEnd) - headerEnd))
+            output.write(meanings.tobytes())
+            output.write(b"\0" * (offsetsOffset - meanings.nbytes))
+            output.write(offsets.tobytes())
+            text.seek(0)
+            shutil.copyfileobj(text, output)
+    return len(meanings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pack the MSH-WSD dataset into a single memory mappable file")
+    parser.add_argument("output", help="path of the packed file to write")
+    parser.add_argument("directories", nargs="+", help="directories of the dataset (ex : acronyms terms)")
+    arguments = parser.parse_args()
+    files = []
+    for directoryPath in arguments.directories:
+        files.extend(getfileListFromDirectory(directoryPath))
+    exampleNumber = packCorpus(files, arguments.output)
+    print(f"{exampleNumber} examples of {len(files)} files packed inside {arguments.output}")
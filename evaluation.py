@@ -0,0 +1,475 @@
+import hashlib
+import json
+import multiprocessing
+import os
+from itertools import islice
+
+from pywsd import lesk as l
+from pywsd.similarity import max_similarity as maxsim
+from pywsd.tokenize import word_tokenize
+from pywsd.utils import lemmatize, lemmatize_sentences, save_lemma_cache
+
+import numpy as np
+import pywsd
+from pywsd.lexicon import get_wordnet_tag, wordnet as wn
+
+from dataset import getContentHash, getWord
+
+# lesk algorithms which can disambiguate all the examples of a word with one call
+BATCH_ALGORITHMS = {l.original_lesk: l.original_lesk_batch,
+                    l.simple_lesk: l.simple_lesk_batch,
+                    l.adapted_lesk: l.adapted_lesk_batch,
+                    l.cosine_lesk: l.cosine_lesk_batch}
+# increase it when a change of pywsd or of the evaluation changes the results, so the old checkpoints are not reused
+CHECKPOINT_VERSION = 2
+# number of examples given at once to the batch algorithms, so the memory used does not grow with the files
+BATCH_SIZE = 256
+
+
+def computeCounterArray(word, algorithm=l.original_lesk, simOption: str = None, wordSynsets=None):
+    """
+    compute an result array to represent the synsets disambiguation by the meaning inside the dataset
+    :param word: string of the path of the file or a Word object already parsed
+    :param algorithm: the name of the function's algorithm
+    :param simOption: option for the maxsim algorithm
+    :param wordSynsets: list of the synsets of the word if they are already known
+    :return: the array of the synsets by meaning numbers
+    """
+
+    word = getWord(word)
+    if wordSynsets is None:
+        wordSynsets = wn.synsets(word.word)
+    if len(wordSynsets) != 0:
+        columns = getSynsetColumns(wordSynsets)
+        counter = np.zeros((word.meaningNumber, len(wordSynsets)), dtype=np.intp)
+        for examples in iterateBlocks(word.examples):
+            if simOption == None and algorithm in BATCH_ALGORITHMS:
+                synsets = BATCH_ALGORITHMS[algorithm]([example.sentence for example in examples], word.word)
+            elif simOption == None:
+                synsets = [algorithm(example.sentence, word.word) for example in examples]
+            else:
+                synsets = [maxsim(example.sentence, word.word, option=simOption) for example in examples]
+            counter += accumulateCounterArray(counter.shape, [example.meaning for example in examples],
+                                              [columns.get(syn, -1) for syn in synsets])
+        return counter
+    else:
+        return None
+
+
+def iterateBlocks(examples, size: int = BATCH_SIZE):
+    """
+    split the examples of a word into lists of at most size examples, only the current list is kept in memory
+    :param examples: iterable of the examples, like the examples of a Word object
+    :param size: maximum number of examples of a list
+    :return: generator of the lists of examples
+    """
+    examples = iter(examples)
+    block = list(islice(examples, size))
+    while block:
+        yield block
+        block = list(islice(examples, size))
+
+
+def getSynsetColumns(wordSynsets):
+    """
+    get the index of the column of each synset inside the counter array
+    :param wordSynsets: list of the synsets of the word, one for each column of the array
+    :return: dictionary of the column keyed by the synset
+    """
+    columns = {}
+    for j in range(0, len(wordSynsets)):
+        columns.setdefault(wordSynsets[j], j)
+    return columns
+
+
+def accumulateCounterArray(shape, meanings, predictions):
+    """
+    count all the disambiguated synsets inside the rows of the meanings of the examples in one operation
+    :param shape: tuple of (amount of meanings, amount of synsets) of the array
+    :param meanings: list of the meaning number of each example
+    :param predictions: list of the column of the synset given by the algorithm for each example, -1 if the
+    algorithm gave no synset or a synset which is not a column of the array
+    :return: the array of the synsets by meaning numbers
+    """
+    meanings = np.asarray(meanings, dtype=np.intp)
+    predictions = np.asarray(predictions, dtype=np.intp)
+    found = predictions >= 0
+    cells = (meanings[found] - 1) * shape[1] + predictions[found]
+    return np.bincount(cells, minlength=shape[0] * shape[1]).reshape(shape)
+
+
+class SentenceAnalysis():
+    """
+    class which keep the preprocessing of a sentence so it is done only once for all the algorithms
+    sentence : string of the sentence
+    lemmas : list of the lemmas given by lemmatize_sentence, used by the lesk algorithms
+    similarityLemmas : list of the lemmas of each token, used by the maxsim algorithm
+    """
+    __slots__ = ("sentence", "_lemmas", "_similarityLemmas")
+
+    def __init__(self, sentence: str):
+        self.sentence = sentence
+        self._lemmas = None
+        self._similarityLemmas = None
+
+    @property
+    def lemmas(self):
+        if self._lemmas is None:
+            lemmatizeAnalyses([self])
+        return self._lemmas
+
+    @property
+    def similarityLemmas(self):
+        if self._similarityLemmas is None:
+            self._similarityLemmas = [lemmatize(w) for w in word_tokenize(self.sentence)]
+        return self._similarityLemmas
+
+
+def lemmatizeAnalyses(analyses):
+    """
+    lemmatize the sentences of several analyses, they are all tagged with one call of the tagger
+    :param analyses: list of SentenceAnalysis objects, the ones already lemmatized are skipped
+    :return: nothing
+    """
+    remaining = [analysis for analysis in analyses if analysis._lemmas is None]
+    for analysis, lemmas in zip(remaining, lemmatize_sentences([analysis.sentence for analysis in remaining])):
+        analysis._lemmas = lemmas
+
+
+def disambiguateAnalysis(analysis: SentenceAnalysis, ambiguousWord: str, algorithm=l.original_lesk,
+                         simOption: str = None):
+    """
+    disambiguate a word with the preprocessing of a sentence already done, it gives the same synset as the
+    algorithm would give with the sentence itself
+    :param analysis: SentenceAnalysis object of the context sentence
+    :param ambiguousWord: string of the ambiguous word
+    :param algorithm: the name of the function's algorithm
+    :param simOption: option for the maxsim algorithm
+    :return: the synset given by the algorithm
+    """
+    if simOption != None:
+        return maxsim(analysis.similarityLemmas, ambiguousWord, option=simOption, context_is_lemmatized=True)
+    elif algorithm == maxsim:
+        return maxsim(analysis.similarityLemmas, ambiguousWord, context_is_lemmatized=True)
+    elif algorithm in [l.simple_lesk, l.adapted_lesk, l.cosine_lesk]:
+        return algorithm(" ".join(analysis.lemmas), ambiguousWord, context_is_lemmatized=True)
+    else:  # original lesk only splits the sentence, other algorithms do their own preprocessing
+        return algorithm(analysis.sentence, ambiguousWord)
+
+
+def computeCounterArrays(word, algorithms, wordSynsets=None):
+    """
+    compute the result arrays of several algorithms while reading the examples of a word only once, the
+    preprocessing of each example is shared by all the algorithms
+    :param word: string of the path of the file or a Word object already parsed
+    :param algorithms: list of tuples (algorithm, simOption), ex : [(l.simple_lesk, None), (maxsim, "path")]
+    :param wordSynsets: list of the synsets of the word if they are already known
+    :return: a list with the array of the synsets by meaning numbers of each algorithm
+    """
+    word = getWord(word)
+    if wordSynsets is None:
+        wordSynsets = wn.synsets(word.word)
+    if len(wordSynsets) != 0:
+        columns = getSynsetColumns(wordSynsets)
+        counters = [np.zeros((word.meaningNumber, len(wordSynsets)), dtype=np.intp) for _ in algorithms]
+        needsLemmas = any(simOption == None and algorithm in [l.simple_lesk, l.adapted_lesk, l.cosine_lesk]
+                          for algorithm, simOption in algorithms)
+        # the examples are analysed by blocks, only the analyses of the current block are kept in memory
+        for examples in iterateBlocks(word.examples):
+            analyses = [SentenceAnalysis(example.sentence) for example in examples]
+            if needsLemmas:
+                # all the abstracts of the block are tagged at once
+                lemmatizeAnalyses(analyses)
+            meanings = [example.meaning for example in examples]
+            for counter, (algorithm, simOption) in zip(counters, algorithms):
+                predictions = [columns.get(disambiguateAnalysis(analysis, word.word, algorithm, simOption), -1)
+                               for analysis in analyses]
+                counter += accumulateCounterArray(counter.shape, meanings, predictions)
+        return counters
+    else:
+        return None
+
+
+def computeAverageAccuracy(word, printRelsult: bool = True, algorithm=l.original_lesk, simOption: str = None):
+    """
+    Compute the average accuracy for a file
+    :param word: path to a file associated to a word or a Word object already parsed
+    :param printRelsult: boolean to specify if you want to print the intermediate result
+    :param algorithm: the name of the function's algorithm
+    :param simOption: option for the maxsim algorithm
+    :return: the percent of the disambiguation accuracy
+    """
+
+    word = getWord(word)
+    wordSynsets = wn.synsets(word.word)
+    if len(wordSynsets) != 0:
+        counter = computeCounterArray(word, algorithm, simOption, wordSynsets)
+        return computeAccuracyFromCounterArray(counter, word, wordSynsets, printRelsult)
+    else:
+        if printRelsult:
+            print(f"The word {word.word} is not in the Wordnet database\n")
+        return None
+
+
+def computeAccuracyFromCounterArray(counter, word, wordSynsets, printRelsult: bool = True):
+    """
+    Compute the average accuracy of a word from its counter array
+    :param counter: the array of the synsets by meaning numbers given by computeCounterArray
+    :param word: the Word object the array was computed for
+    :param wordSynsets: list of the synsets of the word, one for each column of the array
+    :param printRelsult: boolean to specify if you want to print the intermediate result
+    :return: the percent of the disambiguation accuracy
+    """
+    maxima = counter.max(axis=1)
+    meaningAccuracies = maxima / counter.sum(axis=1)
+    totalAccuracy = meaningAccuracies.sum() / len(counter)
+    if printRelsult:
+        for index in range(len(counter)):
+            print(f"M{index + 1} was disambiguated as:")
+            for j in range(len(wordSynsets)):
+                print(f"{counter[index][j]} times as the synset {wordSynsets[j]}")
+            for j in np.flatnonzero(counter[index] == maxima[index]):
+                print(f"M{index + 1} has an accuracy of {'{:2.2f}'.format(meaningAccuracies[index] * 100)}" \
+                      f"% corresponding to the synset {wordSynsets[j]}")
+        print(f"\nThe word {word.word} has an average accuracy equals to {'{:2.2f}'.format(totalAccuracy * 100)}%\n")
+    return totalAccuracy
+
+
+def getWarmUpOptions(algorithms):
+    """
+    get the resources of pywsd needed by the algorithms, so a pool of processes only loads those
+    :param algorithms: list of tuples (algorithm, simOption), ex : [(l.simple_lesk, None), (maxsim, "path")]
+    :return: tuple of the (lesk, similarity) arguments of pywsd.warm_up
+    """
+    lesk = any(simOption == None and algorithm in BATCH_ALGORITHMS for algorithm, simOption in algorithms)
+    similarity = any(simOption != None or algorithm == maxsim for algorithm, simOption in algorithms)
+    return lesk, similarity
+
+
+def computeFileAccuracy(task):
+    """
+    Compute the average accuracy of one file, it can be sent to a process pool
+    :param task: tuple of (file, printRelsult, algorithm, simOption, stream) with the arguments of computeAverageAccuracy
+    :return: the percent of the disambiguation accuracy, None if the word is not in Wordnet
+    """
+    file, printRelsult, algorithm, simOption, stream = task
+    word = getWord(file, stream)
+    print(f"file : {word.path}")
+    return computeAverageAccuracy(word, printRelsult, algorithm, simOption)
+
+
+def computeFileAccuracies(task):
+    """
+    Compute the average accuracy of one file for several algorithms, it can be sent to a process pool
+    :param task: tuple of (file, printRelsult, algorithms, stream)
+    :return: list of the percent of the disambiguation accuracy of each algorithm, None if the word is not in Wordnet
+    """
+    file, printRelsult, algorithms, stream = task
+    word = getWord(file, stream)
+    print(f"file : {word.path}")
+    wordSynsets = wn.synsets(word.word)
+    if len(wordSynsets) != 0:
+        counters = computeCounterArrays(word, algorithms, wordSynsets)
+        return [computeAccuracyFromCounterArray(counter, word, wordSynsets, printRelsult) for counter in counters]
+    else:
+        if printRelsult:
+            print(f"The word {word.word} is not in the Wordnet database\n")
+        return None
+
+
+class Checkpoint():
+    """
+    class which save the result of each file on the disk as soon as it is computed, so a run can be resumed
+    path : string of the path of the checkpoint file, which has one json line per result
+    results : dictionary of the results already computed, keyed by the hash of the file, the algorithm and its options
+    """
+    __slots__ = ("path", "results")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            lastLine = "\n"
+            with open(path, "r") as file:
+                for lastLine in file:
+                    try:
+                        entry = json.loads(lastLine)
+                    except ValueError:  # line which was being written when the run stopped
+                        continue
+                    self.results[entry["key"]] = entry["result"]
+            if not lastLine.endswith("\n"):
+                with open(path, "a") as file:
+                    file.write("\n")
+
+    @staticmethod
+    def getKey(file, algorithmName: str):
+        """
+        get the key of the result of a file, it changes when the content of the file changes
+        :param file: string of the path of a file or a Word object
+        :param algorithmName: string of the algorithm and its options, given by getAlgorithmName
+        :return: string of the key
+        """
+        return hashlib.sha256(f"{getContentHash(file)} {algorithmName}".encode("utf-8")).hexdigest()
+
+    def save(self, key: str, result):
+        """
+        save the result of a file
+        :param key: string of the key given by getKey
+        :param result: the result of the file, it has to be json serializable
+        :return: nothing
+        """
+        self.results[key] = result
+        with open(self.path, "a") as file:
+            file.write(json.dumps({"key": key, "result": result}) + "\n")
+
+    def __contains__(self, key: str):
+        return key in self.results
+
+    def __getitem__(self, key: str):
+        return self.results[key]
+
+
+def getAlgorithmName(algorithm, simOption: str = None):
+    """
+    get a string which identify an algorithm and its option
+    :param algorithm: the name of the function's algorithm
+    :param simOption: option for the maxsim algorithm
+    :return: string of the name
+    """
+    name = f"{algorithm.__module__}.{algorithm.__qualname__}"
+    return name if simOption == None else f"{name}:{simOption}"
+
+
+def getCheckpointSalt(checkpointTag: str = ""):
+    """
+    get a string identifying the versions the results are computed with, it is part of the keys of the checkpoint
+    so a run with another version of pywsd or another WordNet does not reuse the old results
+    :param checkpointTag: string added to the salt, to separate runs the versions do not tell apart
+    :return: string of the salt
+    """
+    return f"v{CHECKPOINT_VERSION} pywsd {pywsd.__version__} {get_wordnet_tag()} {checkpointTag}"
+
+
+def runTask(indexedTask):
+    """
+    run a task and keep its index, so the tasks can be finished in any order by a process pool
+    :param indexedTask: tuple of (function, index, task)
+    :return: tuple of (index, result of the function)
+    """
+    function, index, task = indexedTask
+    result = function(task)
+    if multiprocessing.parent_process() != None:
+        # the workers of a pool exit without saving their new lemmas, the main process saves them when it exits
+        save_lemma_cache()
+    return index, result
+
+
+def computeResults(function, files, tasks, processes: int = 1, checkpointPath: str = None, algorithmName: str = "",
+                   algorithms=(), checkpointTag: str = ""):
+    """
+    run the task of each file, in parallel if processes is not 1, and skip the files already inside the checkpoint
+    :param function: function which compute the result of a task
+    :param files: list of the files, used to get the keys of the checkpoint
+    :param tasks: list of the arguments given to the function, one for each file
+    :param processes: number of processes used to compute the files in parallel, None to use every core
+    :param checkpointPath: string of the path of the checkpoint file, None to not save the results
+    :param algorithmName: string of the algorithm and its options, used to get the keys of the checkpoint
+    :param algorithms: list of tuples (algorithm, simOption) run by the tasks, the pool only loads their resources
+    :param checkpointTag: string added to the keys of the checkpoint, see getCheckpointSalt
+    :return: list of the results in the order of the files
+    """
+    checkpoint = Checkpoint(checkpointPath) if checkpointPath != None else None
+    if checkpoint != None:
+        algorithmName = f"{algorithmName} {getCheckpointSalt(checkpointTag)}"
+    results = [None] * len(tasks)
+    keys = [None] * len(tasks)
+    remainingTasks = []
+    for index, task in enumerate(tasks):
+        if checkpoint != None:
+            keys[index] = checkpoint.getKey(files[index], algorithmName)
+            if keys[index] in checkpoint:
+                results[index] = checkpoint[keys[index]]
+                continue
+        remainingTasks.append((function, index, task))
+
+    def keepResults(indexedResults):
+        for index, result in indexedResults:
+            results[index] = result
+            if checkpoint != None:
+                checkpoint.save(keys[index], result)
+
+    if processes == 1:
+        keepResults(map(runTask, remainingTasks))
+    else:
+        # pywsd loads its resources lazily, load them before forking so the workers share them, the workers
+        # warm up the same way in case they are spawned instead of forked
+        warmUpOptions = getWarmUpOptions(algorithms)
+        pywsd.warm_up(*warmUpOptions)
+        with multiprocessing.Pool(processes, initializer=pywsd.warm_up, initargs=warmUpOptions) as pool:
+            # chunks of one file balance the work because the files have very different sizes
+            keepResults(pool.imap_unordered(runTask, remainingTasks, chunksize=1))
+    return results
+
+
+def computeTotalAverageAccuracy(listOfFiles, printintermediateResult: bool = False, algorithm=l.original_lesk,
+                                simOption: str = None, stream: bool = False, processes: int = 1,
+                                checkpointPath: str = None, checkpointTag: str = ""):
+    """
+    Compute the average accuracy and the number or errors according to a list of files
+    WARNING : do not set simOption with you are not using similarity algorithms
+    :param listOfFiles: list of string of paths or a Corpus object
+    :param printintermediateResult: boolean to specify if you want to print the intermediate result
+    :param algorithm: the name of the function's algorithm
+    :param simOption: option for the maxsim algorithm
+    :param stream: boolean to read the files given by path one example at a time in a single pass, so the memory
+    used does not grow with the size of the files
+    :param processes: number of processes used to compute the files in parallel, None to use every core
+    the accuracies are merged in the order of the files so the result is the same as with only one process
+    :param checkpointPath: string of the path of a file where the accuracy of each file is saved, a new run with
+    the same checkpoint only computes the files which were not finished or whose content changed
+    :param checkpointTag: string added to the keys of the checkpoint, the results saved with another tag, another
+    version of pywsd or another WordNet are computed again
+    :return: totalAccuracy: the mean percent of the disambiguation accuracy; errorCounter : the number of file that can't be computed (not in Wordnet)
+    """
+    files = list(listOfFiles)
+    tasks = [(file, printintermediateResult, algorithm, simOption, stream) for file in files]
+    errorCounter = 0
+    totalAccuracy = 0
+    accuracies = computeResults(computeFileAccuracy, files, tasks, processes, checkpointPath,
+                                getAlgorithmName(algorithm, simOption), [(algorithm, simOption)], checkpointTag)
+    for tempAccuracy in accuracies:
+        if tempAccuracy == None:
+            errorCounter = errorCounter + 1
+        else:
+            totalAccuracy = totalAccuracy + tempAccuracy
+    totalAccuracy = totalAccuracy / (len(files) - errorCounter)
+    return totalAccuracy, errorCounter
+
+
+def computeTotalAverageAccuracies(listOfFiles, algorithms, printintermediateResult: bool = False,
+                                  stream: bool = False, processes: int = 1, checkpointPath: str = None,
+                                  checkpointTag: str = ""):
+    """
+    Compute the average accuracy and the number or errors of several algorithms with a single pass on a list of files
+    :param listOfFiles: list of string of paths or a Corpus object
+    :param algorithms: list of tuples (algorithm, simOption), ex : [(l.simple_lesk, None), (maxsim, "path")]
+    :param printintermediateResult: boolean to specify if you want to print the intermediate result
+    :param stream: boolean to read the files given by path one example at a time
+    :param processes: number of processes used to compute the files in parallel, None to use every core
+    :param checkpointPath: string of the path of a file where the accuracies of each file are saved
+    :param checkpointTag: string added to the keys of the checkpoint, like computeTotalAverageAccuracy
+    :return: a list with a tuple (totalAccuracy, errorCounter) for each algorithm, like computeTotalAverageAccuracy
+    """
+    files = list(listOfFiles)
+    tasks = [(file, printintermediateResult, algorithms, stream) for file in files]
+    errorCounter = 0
+    totalAccuracies = [0] * len(algorithms)
+    algorithmName = ",".join(getAlgorithmName(algorithm, simOption) for algorithm, simOption in algorithms)
+    accuracies = computeResults(computeFileAccuracies, files, tasks, processes, checkpointPath, algorithmName,
+                                algorithms, checkpointTag)
+    for tempAccuracies in accuracies:
+        if tempAccuracies == None:
+            errorCounter = errorCounter + 1
+        else:
+            totalAccuracies = [total + tempAccuracy for total, tempAccuracy in zip(totalAccuracies, tempAccuracies)]
+    return [(totalAccuracy / (len(files) - errorCounter), errorCounter) for totalAccuracy in totalAccuracies]
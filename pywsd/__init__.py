@@ -11,17 +11,16 @@ from __future__ import absolute_import, print_function
 import sys
 import time
 
-from wn import WordNet
-from wn.constants import wordnet_30_dir
+from pywsd.hypernyms import get_hypernym_table
+from pywsd.infocontent import IC_POS, get_information_content
+from pywsd.lexicon import get_wordnet, set_wordnet, wordnet as _wordnet
+from pywsd.utils import get_lemma_cache, get_pos_tagger
 
-__builtins__['wn'] = WordNet(wordnet_30_dir)
+# WordNet is only read the first time `wn` is used.
+__builtins__['wn'] = _wordnet
 
 __version__ = '1.2.4'
 
-# Warm up the library.
-print('Warming up PyWSD (takes ~10 secs)...', end=' ', file=sys.stderr, flush=True)
-start = time.time()
-
 from pywsd.lesk import *
 from pywsd.baseline import *
 from pywsd.similarity import *
@@ -31,5 +30,30 @@ from pywsd.similarity import *
 
 from pywsd.allwords_wsd import disambiguate
 
-simple_lesk('This is a foo bar sentence', 'bar')
-print('took {} secs.'.format(time.time() - start), file=sys.stderr)
+
+def warm_up(lesk=True, similarity=True):
+    """
+    Loads WordNet, the lemma cache, the POS tagger and the resources of the
+    chosen algorithms and runs a first disambiguation, so that the next ones
+    are not slower.
+    Optional: otherwise each of them is loaded when it is first needed.
+
+    :param lesk: Boolean, whether to load the Lesk signatures.
+    :param similarity: Boolean, whether to load the hypernym and the
+        information content tables of max_similarity().
+    """
+    print('Warming up PyWSD (takes ~10 secs)...', end=' ', file=sys.stderr, flush=True)
+    start = time.time()
+    get_wordnet()
+    get_lemma_cache()
+    if lesk or similarity:
+        get_pos_tagger()
+    if lesk:
+        get_cached_signatures()
+        simple_lesk('This is a foo bar sentence', 'bar')
+    if similarity:
+        get_hypernym_table()
+        for resnik in (True, False):
+            for pos in IC_POS:
+                get_information_content(resnik).load(pos)
+    print('took {} secs.'.format(time.time() - start), file=sys.stderr)
@@ -9,6 +9,17 @@
 import re, math
 from collections import Counter
 
+WORD = re.compile(r'\w+')
+
+
+def text_to_vector(text: str) -> Counter:
+    """ Returns the term counts of the words of a sentence/document. """
+    return Counter(WORD.findall(text))
+
+
+def vector_norm(vec: Counter) -> float:
+    return math.sqrt(sum([vec[x] ** 2 for x in vec.keys()]))
+
 
 def cosine_similarity(sent1: str, sent2: str) -> float:
     """
@@ -16,25 +27,17 @@ def cosine_similarity(sent1: str, sent2: str) -> float:
     Thanks to @vpekar, see http://goo.gl/ykibJY
     """
 
-    WORD = re.compile(r'\w+')
-
     def get_cosine(vec1, vec2):
         intersection = set(vec1.keys()) & set(vec2.keys())
         numerator = sum([vec1[x] * vec2[x] for x in intersection])
 
-        sum1 = sum([vec1[x] ** 2 for x in vec1.keys()])
-        sum2 = sum([vec2[x] ** 2 for x in vec2.keys()])
-        denominator = math.sqrt(sum1) * math.sqrt(sum2)
+        denominator = vector_norm(vec1) * vector_norm(vec2)
 
         if not denominator:
             return 0.0
         else:
             return float(numerator) / denominator
 
-    def text_to_vector(text):
-        words = WORD.findall(text)
-        return Counter(words)
-
     vector1 = text_to_vector(sent1)
     vector2 = text_to_vector(sent2)
     cosine = get_cosine(vector1, vector2)
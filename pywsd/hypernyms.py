@@ -0,0 +1,305 @@
+#!/usr/bin/env python -*- coding: utf-8 -*-
+#
+# Python Word Sense Disambiguation (pyWSD): Hypernym tables
+#
+# Copyright (C) 2014-2020 alvations
+# URL:
+# For license information, see LICENSE.md
+
+"""
+Precomputed hypernym tables of every synset, so that the path based
+similarities (path, wup, lch) are table lookups instead of walks of the
+hypernym graph.
+
+Every synset gets an integer ID. For each ID the tables hold its POS, its
+offset, its min/max depth and, in CSR arrays sorted by ancestor ID, all its
+ancestors (itself included) with their shortest hypernym distance. The similarities
+reproduce the ones of the `wn` library with `if_none_return=0`, including
+its simulated *ROOT* for verbs.
+"""
+
+import math
+
+import numpy as np
+from wn.constants import WN_MAX_DEPTH
+
+from pywsd.lexicon import get_wordnet
+
+ROOT = -1  # ID of the simulated *ROOT* synset.
+NO_PATH = np.iinfo(np.int32).max // 2  # Distance of synsets without a common ancestor.
+ROOT_NAME = '*ROOT*'
+POS_CODES = {'n': 0, 'v': 1, 'a': 2, 's': 3, 'r': 4}
+
+_hypernym_table = None
+
+
+class HypernymTable:
+    """
+    The hypernym tables of the synsets of a WordNet.
+    """
+
+    def __init__(self, wordnet):
+        synsets = list(wordnet.all_synsets())
+        self.index = {ss.name(): i for i, ss in enumerate(synsets)}
+        self.pos = np.array([POS_CODES[ss.pos()] for ss in synsets], dtype=np.int8)
+        self.offsets = np.array([ss.offset() for ss in synsets], dtype=np.int64)
+        # Only the verb taxonomies need a simulated root, see Synset._needs_root().
+        self.needs_root = self.pos == POS_CODES['v']
+
+        parents = [[self.index[hypernym.name()] for hypernym in ss.hypernyms() + ss.instance_hypernyms()]
+                   for ss in synsets]
+        ancestors = [None] * len(synsets)
+        min_depth = np.zeros(len(synsets), dtype=np.int16)
+        max_depth = np.zeros(len(synsets), dtype=np.int16)
+
+        def visit(i):
+            # Iterative depth first walk, the parents of a synset are done before it.
+            stack = [i]
+            while stack:
+                current = stack[-1]
+                pending = [parent for parent in parents[current] if ancestors[parent] is None]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                if ancestors[current] is not None:
+                    continue
+                distances = {current: 0}
+                for parent in parents[current]:
+                    for ancestor, distance in ancestors[parent].items():
+                        if distances.get(ancestor, distance + 2) > distance + 1:
+                            distances[ancestor] = distance + 1
+                ancestors[current] = distances
+                if parents[current]:
+                    min_depth[current] = 1 + min(min_depth[parent] for parent in parents[current])
+                    max_depth[current] = 1 + max(max_depth[parent] for parent in parents[current])
+
+        for i in range(len(synsets)):
+            if ancestors[i] is None:
+                visit(i)
+
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.ancestor_indptr = np.zeros(len(synsets) + 1, dtype=np.int64)
+        np.cumsum([len(distances) for distances in ancestors], out=self.ancestor_indptr[1:])
+        self.ancestor_ids = np.empty(self.ancestor_indptr[-1], dtype=np.int32)
+        self.ancestor_distances = np.empty(self.ancestor_indptr[-1], dtype=np.int16)
+        for i, distances in enumerate(ancestors):
+            start, end = self.ancestor_indptr[i], self.ancestor_indptr[i + 1]
+            ids = sorted(distances)
+            self.ancestor_ids[start:end] = ids
+            self.ancestor_distances[start:end] = [distances[ancestor] for ancestor in ids]
+        # Distance of the simulated root, i.e. one more than the farthest ancestor.
+        self.root_distance = np.array([max(distances.values()) + 1 for distances in ancestors], dtype=np.int16)
+        # Rank of the names, the lowest common subsumers are sorted by name.
+        ranks = {name: rank for rank, name in enumerate(sorted(list(self.index) + [ROOT_NAME]))}
+        self.name_rank = np.array([ranks[ss.name()] for ss in synsets], dtype=np.int32)
+        self.root_rank = ranks[ROOT_NAME]
+        self._ancestors = {}
+        # Python lists of the columns read for every pair, indexing a numpy array is slower.
+        self._needs_root = self.needs_root.tolist()
+        self._min_depth = self.min_depth.tolist()
+        self._root_distance = self.root_distance.tolist()
+        self._name_rank = self.name_rank.tolist()
+
+    def __len__(self):
+        return len(self.pos)
+
+    def id(self, ss: "wn.Synset") -> int:
+        """ Returns the ID of a synset, raises KeyError if it isn't in the tables. """
+        return self.index[ss.name()]
+
+    def ancestors(self, i: int) -> dict:
+        """
+        Returns the ancestors of a synset (itself included) with their shortest
+        hypernym distance: dict(ID:int).
+        """
+        if i not in self._ancestors:
+            start, end = self.ancestor_indptr[i], self.ancestor_indptr[i + 1]
+            self._ancestors[i] = dict(zip(self.ancestor_ids[start:end].tolist(),
+                                          self.ancestor_distances[start:end].tolist()))
+        return self._ancestors[i]
+
+    def common_ancestors(self, i: int, j: int) -> dict:
+        """
+        Returns the common ancestors of two synsets with the length of the
+        path linking them through each: dict(ID:int). The similarities of a
+        pair can share it instead of intersecting the ancestors again.
+        """
+        ancestors1, ancestors2 = self.ancestors(i), self.ancestors(j)
+        if len(ancestors1) > len(ancestors2):
+            ancestors1, ancestors2 = ancestors2, ancestors1
+        return {ancestor: distance + ancestors2[ancestor] for ancestor, distance in ancestors1.items()
+                if ancestor in ancestors2}
+
+    def shortest_path_distance(self, i: int, j: int, simulate_root=False, common=None):
+        """
+        Returns the length of the shortest path linking two synsets through a
+        common ancestor, None if there is none.
+
+        :param i: Integer, the ID of a synset, or ROOT.
+        :param j: Integer, the ID of a synset, or ROOT.
+        :param simulate_root: Boolean, whether *ROOT* is an ancestor of every synset.
+        :param common: The common_ancestors(i, j) if already known.
+        """
+        if i == j:
+            return 0
+        if i == ROOT or j == ROOT:
+            return self._root_distance[j if i == ROOT else i] if simulate_root else None
+        distances = list((common if common is not None else self.common_ancestors(i, j)).values())
+        if simulate_root:
+            distances.append(self._root_distance[i] + self._root_distance[j])
+        return min(distances) if distances else None
+
+    def common_distances(self, i: int, js: np.ndarray) -> np.ndarray:
+        """
+        Returns the shortest path lengths through a real common ancestor of a
+        synset with many synsets at once, NO_PATH where there is none.
+
+        :param i: Integer, the ID of a synset.
+        :param js: numpy array of the IDs of the other synsets.
+        """
+        return SharedAncestry(self, i, js).shortest_distances()
+
+    def _rooted(self, distances: np.ndarray, i: int, js: np.ndarray, simulate_root: np.ndarray) -> np.ndarray:
+        # Adds the path through the simulated root where it is simulated.
+        through_root = self.root_distance[i] + self.root_distance[js].astype(np.int32)
+        return np.where(simulate_root, np.minimum(distances, through_root), distances)
+
+    def path_similarities(self, i: int, js: np.ndarray, ancestry=None) -> np.ndarray:
+        """
+        Returns max(path_similarity(i, j), path_similarity(j, i)) of a synset
+        with many synsets at once.
+
+        :param ancestry: The SharedAncestry of i and js if already known.
+        """
+        distances = (ancestry if ancestry is not None else SharedAncestry(self, i, js)).shortest_distances()
+        similarities = np.zeros(len(js))
+        for simulate_root in (np.full(len(js), self._needs_root[i]), self.needs_root[js]):
+            rooted = self._rooted(distances, i, js, simulate_root)
+            found = rooted < NO_PATH
+            similarities[found] = np.maximum(similarities[found], 1.0 / (rooted[found] + 1))
+        return similarities
+
+    def lch_similarities(self, i: int, js: np.ndarray, ancestry=None) -> np.ndarray:
+        """
+        Returns lch_similarity(i, j) of a synset with many synsets at once,
+        0 for the synsets of another POS.
+
+        :param ancestry: The SharedAncestry of i and js if already known.
+        """
+        similarities = np.zeros(len(js))
+        pos = int(self.pos[i])
+        if pos not in (POS_CODES['n'], POS_CODES['v']):
+            return similarities
+        need_root = self._needs_root[i]
+        depth = WN_MAX_DEPTH['3.0'][need_root]['n' if pos == POS_CODES['n'] else 'v']
+        if ancestry is None:
+            ancestry = SharedAncestry(self, i, js)
+        distances = self._rooted(ancestry.shortest_distances(), i, js, need_root)
+        found = np.flatnonzero((self.pos[js] == pos) & (distances < NO_PATH))
+        # math.log, so that the values are exactly the ones of lch_similarity().
+        similarities[found] = [-math.log((distance + 1) / (2.0 * depth)) for distance in distances[found].tolist()]
+        return similarities
+
+    def lowest_common_subsumer(self, i: int, j: int, simulate_root=False, common=None):
+        """
+        Returns the common hypernym with the largest min depth (the first by
+        name on ties), like wn.lowest_common_hypernyms(use_min_depth=True).
+
+        :param common: The common_ancestors(i, j) if already known.
+        :return: The ID of the subsumer, ROOT, or None if there is none.
+        """
+        if common is None:
+            common = self.common_ancestors(i, j)
+        min_depth, name_rank = self._min_depth, self._name_rank
+        # A synset isn't one of its own hypernyms.
+        candidates = [(min_depth[ancestor], -name_rank[ancestor], ancestor)
+                      for ancestor in common if ancestor != i and ancestor != j]
+        if simulate_root:
+            candidates.append((0, -self.root_rank, ROOT))
+        return max(candidates)[2] if candidates else None
+
+    def path_similarity(self, i: int, j: int, common=None) -> float:
+        """ wn.path_similarity(i, j, if_none_return=0). """
+        distance = self.shortest_path_distance(i, j, simulate_root=self._needs_root[i], common=common)
+        if distance is None:
+            return 0
+        return 1.0 / (distance + 1)
+
+    def wup_similarity(self, i: int, j: int, common=None) -> float:
+        """ wn.wup_similarity(i, j, if_none_return=0). """
+        need_root = self._needs_root[i]
+        subsumer = self.lowest_common_subsumer(i, j, simulate_root=need_root, common=common)
+        if subsumer is None:
+            return 0
+        depth = (0 if subsumer == ROOT else int(self.max_depth[subsumer])) + 1
+        len1 = self.shortest_path_distance(i, subsumer, simulate_root=need_root)
+        len2 = self.shortest_path_distance(j, subsumer, simulate_root=need_root)
+        if len1 is None or len2 is None:
+            return 0
+        len1 += depth
+        len2 += depth
+        return (2.0 * depth) / (len1 + len2)
+
+    def lch_similarity(self, i: int, j: int, common=None) -> float:
+        """ wn.lch_similarity(i, j, if_none_return=0) of synsets of the same POS. """
+        pos = int(self.pos[i])
+        if pos not in (POS_CODES['n'], POS_CODES['v']):
+            return 0  # Adjectives and adverbs have no taxonomy.
+        need_root = self._needs_root[i]
+        depth = WN_MAX_DEPTH['3.0'][need_root]['n' if pos == POS_CODES['n'] else 'v']
+        distance = self.shortest_path_distance(i, j, simulate_root=need_root, common=common)
+        if distance is None or depth == 0:
+            return 0
+        return -math.log((distance + 1) / (2.0 * depth))
+
+
+class SharedAncestry:
+    """
+    The ancestors a synset shares with many synsets, gathered once so that
+    all the similarities of a row of synsets can be derived from them.
+
+    :param table: The HypernymTable of the synsets.
+    :param i: Integer, the ID of a synset.
+    :param js: numpy array of the IDs of the other synsets.
+    """
+
+    def __init__(self, table: HypernymTable, i: int, js: np.ndarray):
+        self.i, self.js = i, js
+        dense = np.full(len(table), NO_PATH, dtype=np.int32)
+        start, end = table.ancestor_indptr[i], table.ancestor_indptr[i + 1]
+        dense[table.ancestor_ids[start:end]] = table.ancestor_distances[start:end]
+        # The ancestors of every j one after the other, every synset is its
+        # own ancestor so no segment is empty.
+        starts, lengths = table.ancestor_indptr[js], table.ancestor_indptr[js + 1] - table.ancestor_indptr[js]
+        self.segments = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - self.segments, lengths) + np.arange(lengths.sum())
+        self.ancestor_ids = table.ancestor_ids[positions]
+        # Length of the path through each ancestor, NO_PATH or more if it isn't one of i.
+        self.distances = dense[self.ancestor_ids] + table.ancestor_distances[positions]
+        # The common hypernyms, a synset isn't one of its own hypernyms.
+        self.subsumers = ((self.distances < NO_PATH) & (self.ancestor_ids != i)
+                          & (self.ancestor_ids != np.repeat(js, lengths)))
+
+    def shortest_distances(self) -> np.ndarray:
+        """ Returns the shortest path lengths through a real common ancestor. """
+        return np.minimum.reduceat(self.distances, self.segments)
+
+    def max_over_subsumers(self, values: np.ndarray) -> np.ndarray:
+        """
+        Returns the max of values (indexed by ID) over the common hypernyms
+        of each pair, -inf for the pairs without any.
+        """
+        return np.maximum.reduceat(np.where(self.subsumers, values[self.ancestor_ids], -np.inf), self.segments)
+
+
+def get_hypernym_table() -> HypernymTable:
+    """
+    Returns the hypernym tables of the WordNet used by pyWSD, they are built
+    the first time they are needed.
+    """
+    global _hypernym_table
+    if _hypernym_table is None:
+        _hypernym_table = HypernymTable(get_wordnet())
+    return _hypernym_table
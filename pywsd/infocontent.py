@@ -0,0 +1,156 @@
+#!/usr/bin/env python -*- coding: utf-8 -*-
+#
+# Python Word Sense Disambiguation (pyWSD): Information content tables
+#
+# Copyright (C) 2014-2020 alvations
+# URL:
+# For license information, see LICENSE.md
+
+"""
+Information content (IC) of every synset as an array indexed by the IDs of
+the hypernym tables, with the res, jcn and lin similarities computed from
+it. The values are the ones of `wn.info.WordNetInformationContent` and of
+the `wn` similarities, the most informative subsumer is found over the
+ancestor lists of the hypernym tables, for a pair or for many pairs at once.
+
+An IC file holds the noun and verb counts, each POS is only read the first
+time a synset of that POS is compared.
+"""
+
+import math
+
+import numpy as np
+from wn.constants import _INF, wordnet_ic_dir
+
+from pywsd.hypernyms import POS_CODES, SharedAncestry, get_hypernym_table
+
+IC_POS = ('n', 'v')
+
+_information_contents = {}
+
+
+class InformationContentTable:
+    """
+    The information content of the synsets for an IC file.
+    """
+
+    def __init__(self, filename: str, table=None):
+        self.filename = filename
+        self.table = table if table is not None else get_hypernym_table()
+        # NaN until the POS of the synset is read.
+        self.values = np.full(len(self.table), np.nan)
+        self._loaded = set()
+
+    def load(self, pos: str):
+        """ Reads the counts of a POS from the IC file, once. """
+        if pos in self._loaded:
+            return
+        counts, total = {}, 0
+        with open(self.filename) as fin:
+            next(fin)  # Skip the version line.
+            for line in fin:
+                offset, value, *has_root = line.split()
+                if offset[-1] != pos:
+                    continue
+                value = float(value)
+                if has_root:
+                    total += value
+                counts[int(offset[:-1])] = value
+        ids = np.flatnonzero(self.table.pos == POS_CODES[pos])
+        offsets = self.table.offsets[ids].tolist()
+        # Synsets without counts are treated like a count of 0.
+        self.values[ids] = [-math.log(counts[offset] / total) if counts.get(offset, 0) else _INF
+                            for offset in offsets]
+        self._loaded.add(pos)
+
+    def ic(self, i: int) -> float:
+        """ Returns the IC of a synset, by ID. """
+        value = self.values[i]
+        if value != value:  # NaN, the POS isn't read yet.
+            self.load('n' if self.table.pos[i] == POS_CODES['n'] else 'v')
+            value = self.values[i]
+        return float(value)
+
+    def lcs_ic(self, i: int, j: int, common=None) -> float:
+        """
+        Returns the IC of the most informative common hypernym of two synsets
+        of the same POS, 0 if they have none.
+
+        :param common: The common_ancestors(i, j) of the hypernym tables if already known.
+        """
+        if common is None:
+            common = self.table.common_ancestors(i, j)
+        subsumers = [ancestor for ancestor in common if ancestor != i and ancestor != j]
+        return max(self.ic(ancestor) for ancestor in subsumers) if subsumers else 0
+
+    def similarity(self, measure: str, i: int, j: int, common=None) -> float:
+        """
+        Returns wn.res/jcn/lin_similarity() of two synsets of the same POS.
+
+        :param measure: String, one of ('res', 'jcn', 'lin').
+        :param common: The common_ancestors(i, j) of the hypernym tables if already known.
+        """
+        if measure == 'jcn' and i == j:
+            return _INF
+        ic1, ic2, lcs_ic = self.ic(i), self.ic(j), self.lcs_ic(i, j, common)
+        if measure == 'res':
+            return lcs_ic
+        elif measure == 'jcn':
+            # If either of the synsets is the root or has a count of 0.
+            if ic1 == 0 or ic2 == 0:
+                return 0
+            ic_difference = ic1 + ic2 - 2 * lcs_ic
+            return _INF if ic_difference == 0 else 1 / ic_difference
+        else:
+            return (2.0 * lcs_ic) / (ic1 + ic2) if ic1 + ic2 else 0
+
+    def similarities(self, measure: str, i: int, js: np.ndarray, ancestry=None) -> np.ndarray:
+        """
+        Returns similarity() of a synset with many synsets at once, 0 for the
+        synsets of another POS or of a POS without counts.
+
+        :param ancestry: The SharedAncestry of i and js if already known.
+        """
+        table = self.table
+        result = np.zeros(len(js))
+        pos = int(table.pos[i])
+        if pos not in (POS_CODES['n'], POS_CODES['v']):
+            return result
+        self.ic(i)  # Reads the POS if needed.
+        same = np.flatnonzero(table.pos[js] == pos)
+        if not len(same):
+            return result
+        if ancestry is None:
+            ancestry = SharedAncestry(table, i, js)
+        lcs_ic = ancestry.max_over_subsumers(self.values)[same]
+        lcs_ic[lcs_ic == -np.inf] = 0
+        js = js[same]
+
+        ic1, ic2 = float(self.values[i]), self.values[js]
+        if measure == 'res':
+            scores = lcs_ic
+        elif measure == 'jcn':
+            ic_difference = ic1 + ic2 - 2 * lcs_ic
+            with np.errstate(divide='ignore'):
+                scores = np.where(ic_difference == 0, _INF, 1 / ic_difference)
+            scores = np.where((ic1 == 0) | (ic2 == 0), 0, scores)
+            scores[js == i] = _INF
+        else:
+            denominators = ic1 + ic2
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scores = np.where(denominators != 0, (2.0 * lcs_ic) / denominators, 0)
+        result[same] = scores
+        return result
+
+
+def get_information_content(resnik: bool) -> InformationContentTable:
+    """
+    Returns the BNC information content (add1 smoothing), each POS is only
+    read the first time it is needed.
+
+    :param resnik: Boolean, whether to use the Resnik counts.
+    """
+    if resnik not in _information_contents:
+        filename = '{}/ic-bnc{}-add1.dat'.format(wordnet_ic_dir, '-resnik' if resnik else '')
+        _information_contents[resnik] = InformationContentTable(filename)
+    return _information_contents[resnik]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python -*- coding: utf-8 -*-
+#
+# Python Word Sense Disambiguation (pyWSD): Per-stage timing
+#
+# Copyright (C) 2014-2020 alvations
+# URL:
+# For license information, see LICENSE.md
+
+"""
+Opt-in timing of the stages of the WSD pipeline.
+
+    >>> from pywsd import instrumentation
+    >>> instrumentation.enable()
+    >>> max_similarity('I went to the bank to deposit money', 'bank')
+    >>> instrumentation.print_report()
+
+The time of a stage includes the stages it calls, e.g. `lemmatize` includes
+its `pos_tag` and `synsets` calls. When disabled, a timed function only costs
+one flag check, and the `wn.synsets` lookups are not wrapped at all.
+"""
+
+import sys
+from collections import defaultdict
+from functools import wraps
+from time import perf_counter
+
+from pywsd.lexicon import get_wordnet
+
+_enabled = False
+# Map from stage -> [number of calls, cumulative seconds]
+_stages = defaultdict(lambda: [0, 0.0])
+
+
+def _record(stage: str, seconds: float):
+    entry = _stages[stage]
+    entry[0] += 1
+    entry[1] += seconds
+
+
+def _timed_call(stage: str, function, args, kwargs):
+    start = perf_counter()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        _record(stage, perf_counter() - start)
+
+
+def timed(stage: str):
+    """
+    Decorator which records the calls and the time of a function under a
+    stage name while the instrumentation is enabled.
+
+    :param stage: String, name of the stage in the report.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            return _timed_call(stage, function, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def enable():
+    """ Starts recording the stages, the previous records are kept. """
+    global _enabled
+    _enabled = True
+    # The WordNet lookups are called everywhere through the `wn` builtin, so
+    # they are only wrapped while enabled instead of paying a check per call.
+    lexicon = get_wordnet()
+    if 'synsets' not in vars(lexicon):
+        synsets = lexicon.synsets
+        lexicon.synsets = wraps(synsets)(lambda *args, **kwargs: _timed_call('synsets', synsets, args, kwargs))
+
+
+def disable():
+    """ Stops recording the stages. """
+    global _enabled
+    _enabled = False
+    vars(get_wordnet()).pop('synsets', None)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """ Forgets all the records. """
+    _stages.clear()
+
+
+def report() -> dict:
+    """
+    Returns the records of every stage.
+
+    :return: dict(stage:{'calls': int, 'seconds': float}), slowest stage first.
+    """
+    ranked = sorted(_stages.items(), key=lambda item: item[1][1], reverse=True)
+    return {stage: {'calls': calls, 'seconds': seconds} for stage, (calls, seconds) in ranked}
+
+
+def print_report(file=sys.stderr):
+    """ Prints the records of every stage as a table, slowest stage first. """
+    print('{:<24}{:>12}{:>12}{:>12}'.format('stage', 'calls', 'seconds', 'ms/call'), file=file)
+    for stage, entry in report().items():
+        print('{:<24}{:>12}{:>12.3f}{:>12.4f}'.format(stage, entry['calls'], entry['seconds'],
+                                                       1000 * entry['seconds'] / entry['calls']), file=file)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python -*- coding: utf-8 -*-
+#
+# Python Word Sense Disambiguation (pyWSD): Lemma cache
+#
+# Copyright (C) 2014-2020 alvations
+# URL:
+# For license information, see LICENSE.md
+
+"""
+The disk tier of the memoized lemmatize(): the lemmas computed by previous
+runs, in a SQLite file that is queried for each lemma missing from the
+in-memory tier, so it is never read in full.
+
+The lemmas are keyed by (lexicon, word, pos, neverstem), with an empty pos
+when lemmatize() tagged the word itself. The lexicon is a tag of the
+WordNet and nltk used to compute the lemma, so a run with another WordNet
+doesn't get the lemmas of the previous one. New lemmas are buffered and
+written in one transaction, several processes can share the file.
+"""
+
+import os
+import sqlite3
+
+LEMMA_CACHE_SCHEMA = ('CREATE TABLE IF NOT EXISTS lemmas (lexicon TEXT, word TEXT, pos TEXT, neverstem INTEGER, '
+                      'lemma TEXT, PRIMARY KEY (lexicon, word, pos, neverstem))')
+
+
+class LemmaCache:
+    """
+    The lemmas of a lemma cache file computed with one lexicon, keyed by
+    (word, pos, neverstem).
+
+    :param path: String, the path of the file.
+    :param lexicon: String, the tag of the lexicon of the lemmas.
+    :param flush_every: Integer, the number of new lemmas buffered before
+        they are written to the file.
+    """
+
+    def __init__(self, path: str, lexicon: str = '', flush_every: int = 1024):
+        self.path = path
+        self.lexicon = lexicon
+        self.flush_every = flush_every
+        self._pending = {}
+        self._connection = None
+        self._pid = None
+        self._inherited = []
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # A forked process opens its own connection, SQLite connections can't be
+        # shared. The one of the parent is kept as is, closing it could release its locks.
+        if self._connection is not None and self._pid != os.getpid():
+            self._inherited.append(self._connection)
+            self._connection = None
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute(LEMMA_CACHE_SCHEMA)
+            self._pid = os.getpid()
+        return self._connection
+
+    def __len__(self):
+        self.save()
+        query = 'SELECT COUNT(*) FROM lemmas WHERE lexicon = ?'
+        return self.connection.execute(query, (self.lexicon,)).fetchone()[0]
+
+    def get(self, key: tuple) -> str:
+        """ Returns the lemma of a (word, pos, neverstem) key, None if unknown. """
+        if key in self._pending:
+            return self._pending[key]
+        word, pos, neverstem = key
+        query = 'SELECT lemma FROM lemmas WHERE lexicon = ? AND word = ? AND pos = ? AND neverstem = ?'
+        row = self.connection.execute(query, (self.lexicon, word, pos, int(neverstem))).fetchone()
+        return row[0] if row else None
+
+    def add(self, key: tuple, lemma: str):
+        """ Keeps a new lemma, it is written with the next save(). """
+        self._pending[key] = lemma
+        if len(self._pending) >= self.flush_every:
+            self.save()
+
+    def save(self):
+        """ Writes the new lemmas to the file. """
+        if not self._pending:
+            return
+        rows = [(self.lexicon, word, pos, int(neverstem), lemma)
+                for (word, pos, neverstem), lemma in self._pending.items()]
+        self._pending = {}
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO lemmas VALUES (?, ?, ?, ?, ?)', rows)
+
+    def clear(self):
+        """ Forgets all the lemmas, of every lexicon, and deletes the file. """
+        self._pending = {}
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -8,17 +8,70 @@
 # For license information, see LICENSE.md
 
 import os
+from functools import lru_cache
 from itertools import chain
 
-import pandas as pd
+import numpy as np
 
 from pywsd.tokenize import word_tokenize
-from pywsd.cosine import cosine_similarity as cos_sim
+from pywsd.cosine import text_to_vector, vector_norm
+from pywsd.instrumentation import timed
+from pywsd.signature_store import SignatureStore, compact_signature_store
 from pywsd.stopwords import stopwords as EN_STOPWORDS
-from pywsd.utils import lemmatize, porter, lemmatize_sentence, synset_properties
+from pywsd.utils import lemmatize, porter, lemmatize_sentence, lemmatize_sentences, synset_properties
 
-signatures_picklefile = os.path.dirname(os.path.abspath(__file__)) + '/data/signatures/signatures.pkl'
-cached_signatures = pd.read_pickle(signatures_picklefile)
+signatures_dir = os.path.dirname(os.path.abspath(__file__)) + '/data/signatures'
+signatures_picklefile = signatures_dir + '/signatures.pkl'
+cached_signatures = None
+
+
+def get_cached_signatures():
+    """
+    Returns the cached signatures, they are only opened the first time a Lesk
+    signature is needed. The compact SignatureStore is used when it has been
+    built (see pywsd.signature_store), otherwise the legacy pickle.
+    """
+    global cached_signatures
+    if cached_signatures is None and SignatureStore.exists(signatures_dir):
+        cached_signatures = SignatureStore(signatures_dir)
+    elif cached_signatures is None:
+        import pandas as pd
+        cached_signatures = pd.read_pickle(signatures_picklefile)
+    return cached_signatures
+
+
+def add_signature_overlay(synset_glosses: dict) -> str:
+    """
+    Adds glosses (e.g. domain definitions) to the cached signatures of
+    synsets. They are written as a new overlay segment of the signature
+    store, the base signatures are neither rewritten nor reloaded.
+
+    :param synset_glosses: dict(synset:str), a gloss for each synset.
+    :return: The path of the overlay segment written.
+    """
+    store = get_cached_signatures()
+    if not isinstance(store, SignatureStore):
+        raise ValueError('Signature overlays need a SignatureStore, see pywsd.signature_store')
+    path = store.add_overlay((ss.pos(), ss.offset(), gloss_signatures(gloss))
+                             for ss, gloss in synset_glosses.items())
+    # The engines hold the signatures they were built with.
+    lesk_engine.cache_clear()
+    cosine_engine.cache_clear()
+    return path
+
+
+def compact_signatures() -> int:
+    """
+    Folds the overlay segments into the base signature store.
+
+    :return: The number of synsets written.
+    """
+    global cached_signatures
+    number = compact_signature_store(signatures_dir)
+    cached_signatures = None
+    lesk_engine.cache_clear()
+    cosine_engine.cache_clear()
+    return number
 
 
 def synset_signatures_from_cache(ss: "nltk.corpus.wordnet.Synset", hyperhypo=True,
@@ -29,7 +82,10 @@ def synset_signatures_from_cache(ss: "nltk.corpus.wordnet.Synset", hyperhypo=Tru
         signature_type = 'adapted'
     else:
         signature_type = 'simple'
-    return cached_signatures[ss.name()][signature_type]
+    cache = get_cached_signatures()
+    if isinstance(cache, SignatureStore):
+        return cache.signature(ss, signature_type)
+    return cache[ss.name()][signature_type]
 
 
 def synset_signatures(ss: "wn.Synset", hyperhypo=True, adapted=False,
@@ -71,6 +127,17 @@ def synset_signatures(ss: "wn.Synset", hyperhypo=True, adapted=False,
                              ss.similar_tos())
         signature += set(chain(*[i.lemma_names() for i in related_senses]))
 
+    return normalize_signature(signature, remove_stopwords, to_lemmatize, remove_numbers, lowercase)
+
+
+def normalize_signature(signature: list, remove_stopwords=True, to_lemmatize=True,
+                        remove_numbers=True, lowercase=True) -> set:
+    """
+    Lowercases, removes the stopwords and lemmatizes signature words.
+
+    :param signature: List of strings.
+    :return: A set of signature strings
+    """
     # Lowercase.
     signature = set(s.lower() for s in signature) if lowercase else signature
 
@@ -88,6 +155,20 @@ def synset_signatures(ss: "wn.Synset", hyperhypo=True, adapted=False,
     return set(signature)
 
 
+def gloss_signatures(gloss: str) -> dict:
+    """
+    Returns the words a gloss adds to the three cached signatures, processed
+    like the definition of a synset.
+
+    :param gloss: String, a definition.
+    :return: dict(signature_type:set(str)).
+    """
+    words = word_tokenize(gloss)
+    signature = normalize_signature(words)
+    return {'original': set(words), 'adapted': signature, 'simple': signature}
+
+
+@timed('signatures')
 def signatures(ambiguous_word: str, pos: str = None, hyperhypo=True, adapted=False,
                remove_stopwords=True, to_lemmatize=True, remove_numbers=True,
                lowercase=True, to_stem=False, original_lesk=False, from_cache=True) -> dict:
@@ -128,6 +209,7 @@ def signatures(ambiguous_word: str, pos: str = None, hyperhypo=True, adapted=Fal
     return ss_sign
 
 
+@timed('compare_overlaps')
 def compare_overlaps_greedy(context: list, synsets_signatures: dict) -> "wn.Synset":
     """
     Calculate overlaps between the context sentence and the synset_signatures
@@ -155,6 +237,7 @@ def compare_overlaps_greedy(context: list, synsets_signatures: dict) -> "wn.Syns
     return lesk_sense
 
 
+@timed('compare_overlaps')
 def compare_overlaps(context: list, synsets_signatures: dict,
                      nbest=False, keepscore=False, normalizescore=False) -> "wn.Synset":
     """
@@ -170,7 +253,17 @@ def compare_overlaps(context: list, synsets_signatures: dict,
     for ss in synsets_signatures:
         overlaps = set(synsets_signatures[ss]).intersection(context)
         overlaplen_synsets.append((len(overlaps), ss))
+    return rank_overlaps(overlaplen_synsets, nbest, keepscore, normalizescore)
+
+
+def rank_overlaps(overlaplen_synsets: list, nbest=False, keepscore=False, normalizescore=False):
+    """
+    Ranks the synsets from highest overlap to lowest.
 
+    :param overlaplen_synsets: List of (overlap, synset) tuples.
+    :return: The ranked list of synsets (with their scores if keepscore) if
+        nbest, otherwise the Synset with the highest overlap.
+    """
     # Rank synsets from highest to lowest overlap.
     ranked_synsets = sorted(overlaplen_synsets, reverse=True)
 
@@ -186,6 +279,156 @@ def compare_overlaps(context: list, synsets_signatures: dict,
     return ranked_synsets if nbest else ranked_synsets[0]
 
 
+class LeskEngine:
+    """
+    Overlap scorer of the candidate senses of an ambiguous word.
+
+    The signatures are encoded once as a binary sense-by-token matrix whose
+    columns are the tokens of the candidate signatures only, since a context
+    token outside of them can't overlap. The overlaps of many contexts with
+    all the senses are then a single matrix product.
+    """
+
+    def __init__(self, synsets_signatures: dict):
+        self.synsets = list(synsets_signatures)
+        self.token_ids = {}
+        rows, columns = [], []
+        for row, ss in enumerate(self.synsets):
+            for token in set(synsets_signatures[ss]):
+                rows.append(row)
+                columns.append(self.token_ids.setdefault(token, len(self.token_ids)))
+        self.matrix = np.zeros((len(self.synsets), len(self.token_ids)), dtype=np.int32)
+        self.matrix[rows, columns] = 1
+
+    def encode(self, contexts: list) -> np.ndarray:
+        """
+        Returns the binary context-by-token matrix of tokenized contexts.
+
+        :param contexts: List of lists of strings.
+        """
+        encoded = np.zeros((len(contexts), len(self.token_ids)), dtype=np.int32)
+        for row, context in enumerate(contexts):
+            encoded[row, [self.token_ids[token] for token in context if token in self.token_ids]] = 1
+        return encoded
+
+    @timed('compare_overlaps')
+    def overlaps(self, contexts: list) -> np.ndarray:
+        """
+        Returns the context-by-sense matrix of the overlap counts, i.e. the
+        number of distinct context tokens found in each signature.
+
+        :param contexts: List of lists of strings.
+        """
+        return self.encode(contexts) @ self.matrix.T
+
+    def best(self, contexts: list) -> list:
+        """
+        Returns the sense with the highest overlap of each context like
+        compare_overlaps_greedy(), None when nothing overlaps.
+        """
+        if not self.synsets:
+            return [None] * len(contexts)
+        overlaps = self.overlaps(contexts)
+        best = overlaps.argmax(axis=1)
+        return [self.synsets[i] if overlaps[row, i] > 0 else None for row, i in enumerate(best.tolist())]
+
+    def rank(self, contexts: list, nbest=False, keepscore=False, normalizescore=False) -> list:
+        """
+        Returns the result of compare_overlaps() for each context.
+        """
+        overlaps = self.overlaps(contexts).tolist()
+        return [rank_overlaps(list(zip(scores, self.synsets)), nbest, keepscore, normalizescore)
+                for scores in overlaps]
+
+
+@lru_cache(maxsize=1024)
+def lesk_engine(ambiguous_word: str, pos: str = None, hyperhypo=True, adapted=False,
+                stop=True, lemma=True, stem=False, original_lesk=False, from_cache=True) -> LeskEngine:
+    """
+    Returns the LeskEngine of the signatures of a lemmatized ambiguous word,
+    it is only built once for the same signature options.
+    """
+    return LeskEngine(signatures(ambiguous_word, pos=pos, hyperhypo=hyperhypo, adapted=adapted,
+                                 remove_stopwords=stop, to_lemmatize=lemma,
+                                 remove_numbers=True, lowercase=True, to_stem=stem,
+                                 original_lesk=original_lesk, from_cache=from_cache))
+
+
+def tokenize_contexts(context_sentences: list, context_is_lemmatized=False) -> list:
+    if context_is_lemmatized:
+        return [context_sentence.split() for context_sentence in context_sentences]
+    # All the contexts are tagged at once.
+    return lemmatize_sentences(context_sentences)
+
+
+class CosineEngine:
+    """
+    Cosine scorer of the candidate senses of an ambiguous word.
+
+    The term vectors of the signatures and their norms are computed once, so
+    that the cosines of many contexts with all the senses are a single
+    matrix product divided by the norms. The counts are kept as integers and
+    divided by the norms last, in the same order as cosine_similarity(), so
+    the scores are exactly the same floats.
+    """
+
+    def __init__(self, synsets_signatures: dict):
+        self.synsets = list(synsets_signatures)
+        self.token_ids = {}
+        vectors = []
+        for signature in synsets_signatures.values():
+            # Lowercase and replace "_" with spaces.
+            vectors.append(text_to_vector(" ".join(map(str, signature)).lower().replace("_", " ")))
+            for token in vectors[-1]:
+                self.token_ids.setdefault(token, len(self.token_ids))
+        self.matrix = np.zeros((len(self.synsets), len(self.token_ids)), dtype=np.int64)
+        for row, vector in enumerate(vectors):
+            for token, count in vector.items():
+                self.matrix[row, self.token_ids[token]] = count
+        self.norms = np.array([vector_norm(vector) for vector in vectors], dtype=np.float64)
+
+    @timed('cosine_similarity')
+    def scores(self, context_sentences: list) -> np.ndarray:
+        """
+        Returns the context-by-sense matrix of the cosine similarities.
+
+        :param context_sentences: List of strings, sentences or documents.
+        """
+        encoded = np.zeros((len(context_sentences), len(self.token_ids)), dtype=np.int64)
+        context_norms = np.empty(len(context_sentences), dtype=np.float64)
+        for row, context_sentence in enumerate(context_sentences):
+            vector = text_to_vector(context_sentence)
+            for token, count in vector.items():
+                if token in self.token_ids:
+                    encoded[row, self.token_ids[token]] = count
+            context_norms[row] = vector_norm(vector)
+        denominators = context_norms[:, None] * self.norms[None, :]
+        numerators = (encoded @ self.matrix.T).astype(np.float64)
+        return np.divide(numerators, denominators, out=np.zeros_like(denominators), where=denominators != 0)
+
+    def rank(self, context_sentences: list, nbest=False) -> list:
+        """
+        Returns the result of cosine_lesk() for each context.
+        """
+        results = []
+        for scores in self.scores(context_sentences).tolist():
+            ranked = sorted(zip(scores, self.synsets), reverse=True)
+            results.append(ranked if nbest else ranked[0][1])
+        return results
+
+
+@lru_cache(maxsize=1024)
+def cosine_engine(ambiguous_word: str, pos: str = None, lemma=True, stem=True, hyperhypo=True,
+                  stop=True, from_cache=True) -> CosineEngine:
+    """
+    Returns the CosineEngine of the simple signatures of a lemmatized
+    ambiguous word, it is only built once for the same signature options.
+    """
+    return CosineEngine(simple_signatures(ambiguous_word, pos, lemma, stem, hyperhypo, stop,
+                                          from_cache=from_cache))
+
+
+@timed('original_lesk')
 def original_lesk(context_sentence: str, ambiguous_word: str, dictionary=None, from_cache=True) -> "wn.Synset":
     """
     This function is the implementation of the original Lesk algorithm (1986).
@@ -197,12 +440,26 @@ def original_lesk(context_sentence: str, ambiguous_word: str, dictionary=None, f
     :return: A Synset for the estimated best sense.
     """
 
+    return original_lesk_batch([context_sentence], ambiguous_word, dictionary, from_cache)[0]
+
+
+@timed('original_lesk_batch')
+def original_lesk_batch(context_sentences: list, ambiguous_word: str, dictionary=None,
+                        from_cache=True) -> list:
+    """
+    original_lesk() of several contexts of the same ambiguous word, their
+    overlaps are computed at once.
+
+    :param context_sentences: List of strings, sentences or documents.
+    :param ambiguous_word: String, a single word.
+    :return: A list of the Synset estimated for each context.
+    """
     ambiguous_word = lemmatize(ambiguous_word)
     if not dictionary:  # If dictionary is not provided, use the WN defintion.
-        dictionary = signatures(ambiguous_word, original_lesk=True, from_cache=from_cache)
-    best_sense = compare_overlaps_greedy(context_sentence.split(), dictionary)
-
-    return best_sense
+        engine = lesk_engine(ambiguous_word, original_lesk=True, from_cache=from_cache)
+    else:
+        engine = LeskEngine(dictionary)
+    return engine.best([context_sentence.split() for context_sentence in context_sentences])
 
 
 def simple_signatures(ambiguous_word: str, pos: str = None, lemma=True, stem=False,
@@ -225,6 +482,7 @@ def simple_signatures(ambiguous_word: str, pos: str = None, lemma=True, stem=Fal
     return synsets_signatures
 
 
+@timed('simple_lesk')
 def simple_lesk(context_sentence: str, ambiguous_word: str,
                 pos: str = None, lemma=True, stem=False, hyperhypo=True,
                 stop=True, context_is_lemmatized=False,
@@ -240,20 +498,40 @@ def simple_lesk(context_sentence: str, ambiguous_word: str,
     :param pos: String, one of 'a', 'r', 's', 'n', 'v', or None.
     :return: A Synset for the estimated best sense.
     """
+    return simple_lesk_batch([context_sentence], ambiguous_word, pos, lemma, stem, hyperhypo,
+                             stop, context_is_lemmatized, nbest, keepscore, normalizescore,
+                             from_cache)[0]
+
+
+@timed('simple_lesk_batch')
+def simple_lesk_batch(context_sentences: list, ambiguous_word: str,
+                      pos: str = None, lemma=True, stem=False, hyperhypo=True,
+                      stop=True, context_is_lemmatized=False,
+                      nbest=False, keepscore=False, normalizescore=False,
+                      from_cache=True) -> list:
+    """
+    simple_lesk() of several contexts of the same ambiguous word, their
+    overlaps are computed at once.
+
+    :param context_sentences: List of strings, sentences or documents.
+    :param ambiguous_word: String, a single word.
+    :param pos: String, one of 'a', 'r', 's', 'n', 'v', or None.
+    :return: A list of the result of simple_lesk() for each context.
+    """
     # Ensure that ambiguous word is a lemma.
     ambiguous_word = lemmatize(ambiguous_word, pos=pos)
     # If ambiguous word not in WordNet return None
     if not wn.synsets(ambiguous_word):
-        return None
+        return [None] * len(context_sentences)
     # Get the signatures for each synset.
-    ss_sign = simple_signatures(ambiguous_word, pos, lemma, stem, hyperhypo, stop,
-                                from_cache=from_cache)
-    # Disambiguate the sense in context.
-    context_sentence = context_sentence.split() if context_is_lemmatized else lemmatize_sentence(context_sentence)
-    return compare_overlaps(context_sentence, ss_sign, nbest=nbest,
-                            keepscore=keepscore, normalizescore=normalizescore)
+    engine = lesk_engine(ambiguous_word, pos, hyperhypo, False, stop, lemma, stem,
+                         from_cache=from_cache)
+    # Disambiguate the senses in context.
+    return engine.rank(tokenize_contexts(context_sentences, context_is_lemmatized),
+                       nbest=nbest, keepscore=keepscore, normalizescore=normalizescore)
 
 
+@timed('adapted_lesk')
 def adapted_lesk(context_sentence: str, ambiguous_word: str,
                  pos: str = None, lemma=True, stem=False, hyperhypo=True,
                  stop=True, context_is_lemmatized=False,
@@ -271,24 +549,40 @@ def adapted_lesk(context_sentence: str, ambiguous_word: str,
     :param pos: String, one of 'a', 'r', 's', 'n', 'v', or None.
     :return: A Synset for the estimated best sense.
     """
+    return adapted_lesk_batch([context_sentence], ambiguous_word, pos, lemma, stem, hyperhypo,
+                              stop, context_is_lemmatized, nbest, keepscore, normalizescore,
+                              from_cache)[0]
+
+
+@timed('adapted_lesk_batch')
+def adapted_lesk_batch(context_sentences: list, ambiguous_word: str,
+                       pos: str = None, lemma=True, stem=False, hyperhypo=True,
+                       stop=True, context_is_lemmatized=False,
+                       nbest=False, keepscore=False, normalizescore=False,
+                       from_cache=True) -> list:
+    """
+    adapted_lesk() of several contexts of the same ambiguous word, their
+    overlaps are computed at once.
 
+    :param context_sentences: List of strings, sentences or documents.
+    :param ambiguous_word: String, a single word.
+    :param pos: String, one of 'a', 'r', 's', 'n', 'v', or None.
+    :return: A list of the result of adapted_lesk() for each context.
+    """
     # Ensure that ambiguous word is a lemma.
     ambiguous_word = lemmatize(ambiguous_word)
     # If ambiguous word not in WordNet return None
     if not wn.synsets(ambiguous_word):
-        return None
+        return [None] * len(context_sentences)
     # Get the signatures for each synset.
-    ss_sign = signatures(ambiguous_word, pos=pos, hyperhypo=hyperhypo, adapted=True,
-                         remove_stopwords=stop, to_lemmatize=lemma,
-                         remove_numbers=True, lowercase=True, to_stem=stem,
+    engine = lesk_engine(ambiguous_word, pos, hyperhypo, True, stop, lemma, stem,
                          from_cache=from_cache)
-
-    # Disambiguate the sense in context.
-    context_sentence = context_sentence.split() if context_is_lemmatized else lemmatize_sentence(context_sentence)
-    return compare_overlaps(context_sentence, ss_sign, nbest=nbest,
-                            keepscore=keepscore, normalizescore=normalizescore)
+    # Disambiguate the senses in context.
+    return engine.rank(tokenize_contexts(context_sentences, context_is_lemmatized),
+                       nbest=nbest, keepscore=keepscore, normalizescore=normalizescore)
 
 
+@timed('cosine_lesk')
 def cosine_lesk(context_sentence: str, ambiguous_word: str,
                 pos: str = None, lemma=True, stem=True, hyperhypo=True,
                 stop=True, context_is_lemmatized=False,
@@ -304,24 +598,31 @@ def cosine_lesk(context_sentence: str, ambiguous_word: str,
     :return: A Synset for the estimated best sense.
     """
 
+    return cosine_lesk_batch([context_sentence], ambiguous_word, pos, lemma, stem, hyperhypo,
+                             stop, context_is_lemmatized, nbest, from_cache)[0]
+
+
+@timed('cosine_lesk_batch')
+def cosine_lesk_batch(context_sentences: list, ambiguous_word: str,
+                      pos: str = None, lemma=True, stem=True, hyperhypo=True,
+                      stop=True, context_is_lemmatized=False,
+                      nbest=False, from_cache=True) -> list:
+    """
+    cosine_lesk() of several contexts of the same ambiguous word, their
+    cosines are computed at once.
+
+    :param context_sentences: List of strings, sentences or documents.
+    :param ambiguous_word: String, a single word.
+    :param pos: String, one of 'a', 'r', 's', 'n', 'v', or None.
+    :return: A list of the result of cosine_lesk() for each context.
+    """
     # Ensure that ambiguous word is a lemma.
     ambiguous_word = lemmatize(ambiguous_word)
 
     # If ambiguous word not in WordNet return None
     if not wn.synsets(ambiguous_word):
-        return None
-    ss_sign = simple_signatures(ambiguous_word, pos, lemma, stem, hyperhypo, stop,
-                                from_cache=from_cache)
-    if context_is_lemmatized:
-        context_sentence = " ".join(context_sentence.split())
-    else:
-        context_sentence = " ".join(lemmatize_sentence(context_sentence))
-
-    scores = []
-    for ss, signature in ss_sign.items():
-        # Lowercase and replace "_" with spaces.
-        signature = " ".join(map(str, signature)).lower().replace("_", " ")
-        scores.append((cos_sim(context_sentence, signature), ss))
-
-    scores = sorted(scores, reverse=True)
-    return scores if nbest else scores[0][1]
+        return [None] * len(context_sentences)
+    engine = cosine_engine(ambiguous_word, pos, lemma, stem, hyperhypo, stop,
+                           from_cache=from_cache)
+    contexts = [" ".join(context) for context in tokenize_contexts(context_sentences, context_is_lemmatized)]
+    return engine.rank(contexts, nbest=nbest)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python -*- coding: utf-8 -*-
+#
+# Python Word Sense Disambiguation (pyWSD): Shared WordNet
+#
+# Copyright (C) 2014-2020 alvations
+# URL:
+# For license information, see LICENSE.md
+
+import builtins
+import os
+
+wordnet_snapshot_path = os.path.dirname(os.path.abspath(__file__)) + '/data/wordnet.snapshot'
+_wordnet = None
+
+
+def get_wordnet():
+    """
+    Returns the WordNet used by pyWSD, it is only opened the first time it is
+    needed. The compiled snapshot is used when it has been built (see
+    pywsd.lexicon_snapshot), otherwise the database files of `wn`.
+    """
+    global _wordnet
+    if _wordnet is None:
+        from pywsd.lexicon_snapshot import SnapshotWordNet
+        if SnapshotWordNet.exists(wordnet_snapshot_path):
+            _wordnet = SnapshotWordNet(wordnet_snapshot_path)
+        else:
+            from wn import WordNet
+            from wn.constants import wordnet_30_dir
+            _wordnet = WordNet(wordnet_30_dir)
+        # Later lookups of the `wn` builtin go straight to the loaded WordNet.
+        builtins.wn = _wordnet
+    return _wordnet
+
+
+def get_wordnet_tag() -> str:
+    """
+    Returns a string identifying the WordNet used by pyWSD (its class, version
+    and files), to tag the results computed with it.
+    """
+    lexicon = get_wordnet()
+    source = getattr(lexicon, 'path', None) or getattr(lexicon, 'wordnet_data_dir', None)
+    return '{} {} {}'.format(type(lexicon).__name__, lexicon.version(),
+                             os.path.abspath(source) if source else '').strip()
+
+
+def set_wordnet(lexicon):
+    """
+    Makes pyWSD, and the code using `pywsd.lexicon.wordnet`, use the given
+    WordNet instead of the default one, e.g. a SnapshotWordNet of another
+    path or a `wn.WordNet` of other database files.
+
+    :param lexicon: The WordNet, with the API of `wn.WordNet`.
+    """
+    global _wordnet
+    # The hypernym and information content tables are built from the first one.
+    if _wordnet is not None and _wordnet is not lexicon:
+        raise ValueError('pyWSD already uses {!r}, set the WordNet before it is first used'.format(_wordnet))
+    _wordnet = lexicon
+    builtins.wn = _wordnet
+
+
+class LazyWordNet:
+    """
+    Stands for the WordNet of pyWSD until it is first used, e.g. for the `wn`
+    builtin.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_wordnet(), name)
+
+    def __repr__(self):
+        return 'LazyWordNet()'
+
+
+# The WordNet shared by pyWSD and its callers, to be imported instead of
+# nltk.corpus.wordnet so that one WordNet is loaded and the synsets of both
+# are the same objects.
+wordnet = LazyWordNet()
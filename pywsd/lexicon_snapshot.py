@@ -0,0 +1,516 @@
+#!/usr/bin/env python -*- coding: utf-8 -*-
+#
+# Python Word Sense Disambiguation (pyWSD): Compiled WordNet snapshot
+#
+# Copyright (C) 2014-2020 alvations
+# URL:
+# For license information, see LICENSE.md
+
+"""
+WordNet compiled once into a single memory mapped file, so that a process
+opens it in milliseconds instead of parsing the database text files, and
+the processes using the same snapshot share its memory.
+
+The synsets get integer IDs in the order of `wn.WordNet.all_synsets()`, the
+IDs of the hypernym tables. The file holds, in flat arrays:
+
+- the POS, offset, lexicographer file, name, definition and examples of
+  every synset, the strings being IDs into one string table;
+- the lemmas of every synset with their sense key and count;
+- the synset and lemma pointers, in CSR arrays: the relations of the i-th
+  synset are `relation_*[relation_indptr[i]:relation_indptr[i + 1]]`, the
+  targets of a relation sorted by name like `Synset._related()`;
+- the index of the lemma forms, an open addressing hash table over the
+  forms and the synset IDs of each (form, POS) in the order of the
+  `index.*` files, which `synsets()` and morphy read.
+
+`SnapshotWordNet` serves the `wn.WordNet` API used by pyWSD from it, with
+the same results. Synset and lemma objects are only created when they are
+looked up.
+
+    $ python -m pywsd.lexicon_snapshot pywsd/data/wordnet.snapshot
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import warnings
+import zlib
+from itertools import chain, islice
+
+import numpy as np
+from wn.constants import (MORPHOLOGICAL_SUBSTITUTIONS, POS_LIST, exception_map,
+                          lexnames, wordnet_30_dir)
+from wn.info import InformationContentSimilarities
+from wn.lemma import Lemma
+from wn.path import WordNetPaths
+from wn.synset import Synset
+from wn.utils import WordNetError
+
+from pywsd.signature_store import _align_to_8
+
+SNAPSHOT_MAGIC = b'PYWSDWN1'
+SNAPSHOT_HEADER_STRUCT = struct.Struct('<8sQ')
+# The POS of the index files, the adjective satellites are indexed as adjectives.
+INDEX_POS = ('n', 'v', 'a', 'r')
+NO_STRING = -1
+_OFFSET_GROUPS = {'n': 0, 'v': 1, 'a': 2, 's': 2, 'r': 3}
+_SENSENUM_RE = re.compile(r'\.[\da-z]\.\d+\.')
+
+
+def _index_column(pos: str) -> int:
+    return INDEX_POS.index('a' if pos == 's' else pos)
+
+
+def _form_hash(form: str) -> int:
+    # A hash that doesn't change between processes, unlike hash().
+    return zlib.crc32(form.encode('utf8'))
+
+
+def _csr_indptr(lengths: list) -> np.ndarray:
+    indptr = np.zeros(len(lengths) + 1, dtype='<i8')
+    np.cumsum(lengths, out=indptr[1:])
+    return indptr
+
+
+def compile_snapshot(path: str, wordnet=None) -> int:
+    """
+    Compiles a WordNet into a snapshot file.
+
+    :param path: String, the path of the snapshot to write.
+    :param wordnet: The `wn.WordNet` to compile, by default the WordNet 3.0
+        database files of `wn`.
+    :return: The number of synsets written.
+    """
+    if wordnet is None:
+        from wn import WordNet
+        wordnet = WordNet(wordnet_30_dir)
+    synsets = list(wordnet.all_synsets())
+    ids = {ss.name(): i for i, ss in enumerate(synsets)}
+    strings = {}
+
+    def string_id(text):
+        return NO_STRING if text is None else strings.setdefault(text, len(strings))
+
+    lemma_indptr = _csr_indptr([len(ss.lemmas()) for ss in synsets])
+    symbols = sorted({symbol for ss in synsets for symbol in ss._pointers}
+                     | {symbol for ss in synsets for lemma in ss.lemmas() for _, symbol in lemma._lemma_pointers})
+    symbol_codes = {symbol: code for code, symbol in enumerate(symbols)}
+
+    relations, lemma_relations, lemma_columns = [], [], []
+    for i, ss in enumerate(synsets):
+        relations.append([(symbol_codes[symbol], ids[target.name()])
+                          for symbol in sorted(ss._pointers) for target in ss._related(symbol)])
+        for lemma in ss.lemmas():
+            # The lemma pointers of a synset are keyed by the name of the source lemma.
+            targets = []
+            for (name, symbol), pointers in sorted(lemma._lemma_pointers.items()):
+                if name != lemma.name():
+                    continue
+                for pos, offset, lemma_index in pointers:
+                    target = ids[wordnet.synset_from_pos_and_offset(pos, offset).name()]
+                    targets.append((symbol_codes[symbol], int(lemma_indptr[target]) + lemma_index))
+            lemma_relations.append(targets)
+            lemma_columns.append((string_id(lemma.name()), lemma._lex_id, string_id(lemma.syntactic_marker()),
+                                  string_id(lemma.key()), lemma.count()))
+
+    # The lemma forms, with the synset IDs of each of their index POS.
+    lemma_pos_offsets = wordnet._lemma_pos_offset_map
+    forms = sorted(form for form in lemma_pos_offsets if isinstance(form, str) and lemma_pos_offsets[form])
+    index_lengths, index_synsets = [], []
+    for form in forms:
+        for pos in INDEX_POS:
+            offsets = lemma_pos_offsets[form].get(pos, [])
+            index_lengths.append(len(offsets))
+            index_synsets.extend(ids[wordnet.synset_from_pos_and_offset(pos, offset).name()] for offset in offsets)
+    slots = np.zeros(1 << (2 * len(forms)).bit_length(), dtype='<u4')
+    mask = len(slots) - 1
+    for entry, form in enumerate(forms):
+        slot = _form_hash(form) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = entry + 1  # 0 for the empty slots.
+
+    offset_keys = np.array([_OFFSET_GROUPS[ss.pos()] << 32 | ss.offset() for ss in synsets], dtype='<i8')
+    offset_order = np.argsort(offset_keys, kind='stable')
+
+    arrays = {
+        'synset_pos': np.array([POS_LIST.index(ss.pos()) for ss in synsets], dtype='u1'),
+        'synset_offset': np.array([ss.offset() for ss in synsets], dtype='<u4'),
+        'synset_lexname': np.array([lexnames.index(ss.lexname()) for ss in synsets], dtype='u1'),
+        'synset_name': np.array([string_id(ss.name()) for ss in synsets], dtype='<i4'),
+        'synset_definition': np.array([string_id(ss.definition()) for ss in synsets], dtype='<i4'),
+        'example_indptr': _csr_indptr([len(ss.examples()) for ss in synsets]),
+        'examples': np.array([string_id(example) for ss in synsets for example in ss.examples()], dtype='<i4'),
+        'lemma_indptr': lemma_indptr,
+        'lemma_name': np.array([columns[0] for columns in lemma_columns], dtype='<i4'),
+        'lemma_lex_id': np.array([columns[1] for columns in lemma_columns], dtype='u1'),
+        'lemma_marker': np.array([columns[2] for columns in lemma_columns], dtype='<i4'),
+        'lemma_key': np.array([columns[3] for columns in lemma_columns], dtype='<i4'),
+        'lemma_count': np.array([columns[4] for columns in lemma_columns], dtype='<u4'),
+        'relation_indptr': _csr_indptr([len(targets) for targets in relations]),
+        'relation_symbol': np.array([symbol for targets in relations for symbol, _ in targets], dtype='u1'),
+        'relation_target': np.array([target for targets in relations for _, target in targets], dtype='<u4'),
+        'lemma_relation_indptr': _csr_indptr([len(targets) for targets in lemma_relations]),
+        'lemma_relation_symbol': np.array([symbol for targets in lemma_relations for symbol, _ in targets],
+                                          dtype='u1'),
+        'lemma_relation_target': np.array([target for targets in lemma_relations for _, target in targets],
+                                          dtype='<u4'),
+        'offset_keys': offset_keys[offset_order],
+        'offset_ids': offset_order.astype('<u4'),
+        'index_form': np.array([string_id(form) for form in forms], dtype='<i4'),
+        'index_indptr': _csr_indptr(index_lengths),
+        'index_synsets': np.array(index_synsets, dtype='<u4'),
+        'index_slots': slots,
+    }
+    encoded = [text.encode('utf8') for text in strings]
+    arrays['string_indptr'] = _csr_indptr([len(text) for text in encoded])
+    arrays['string_data'] = np.frombuffer(b''.join(encoded), dtype='u1')
+
+    layout, position = {}, 0
+    for name, array in arrays.items():
+        layout[name] = [position, len(array), array.dtype.str]
+        position = _align_to_8(position + array.nbytes)
+    header = json.dumps({'version': wordnet.version(), 'symbols': symbols, 'arrays': layout}).encode('utf8')
+    header_end = SNAPSHOT_HEADER_STRUCT.size + len(header)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Written next to the snapshot then renamed, the processes which mapped
+    # the previous snapshot keep reading it.
+    with open(path + '.tmp', 'wb') as fout:
+        fout.write(SNAPSHOT_HEADER_STRUCT.pack(SNAPSHOT_MAGIC, len(header)))
+        fout.write(header)
+        fout.write(b'\0' * (_align_to_8(header_end) - header_end))
+        for array in arrays.values():
+            fout.write(array.tobytes())
+            fout.write(b'\0' * (_align_to_8(array.nbytes) - array.nbytes))
+    os.replace(path + '.tmp', path)
+    return len(synsets)
+
+
+class SnapshotSynset(Synset):
+    """
+    A synset of a SnapshotWordNet, its attributes are read from the snapshot
+    the first time they are needed.
+    """
+
+    def __init__(self, wordnet: "SnapshotWordNet", i: int):
+        self._wordnet = wordnet
+        self._id = i
+        arrays = wordnet.arrays
+        self._offset = int(arrays['synset_offset'][i])
+        self._pos = POS_LIST[arrays['synset_pos'][i]]
+        self._name = wordnet.string(arrays['synset_name'][i])
+        self._wordnet_line = None
+        self._pointer_ids = None
+        self._lemma_list = None
+
+    def __repr__(self):
+        # Printed like the synsets of wn.
+        return "Synset('%s')" % self._name
+
+    def __reduce__(self):
+        # Pickled by name, the other process opens its own lexicon.
+        return _unpickle_synset, (self._name,)
+
+    @property
+    def _lexname(self) -> str:
+        return lexnames[self._wordnet.arrays['synset_lexname'][self._id]]
+
+    @property
+    def _definition(self) -> str:
+        return self._wordnet.string(self._wordnet.arrays['synset_definition'][self._id])
+
+    @property
+    def _examples(self) -> list:
+        arrays = self._wordnet.arrays
+        start, end = arrays['example_indptr'][self._id:self._id + 2]
+        return [self._wordnet.string(string) for string in arrays['examples'][start:end].tolist()]
+
+    @property
+    def _lemmas(self) -> list:
+        if self._lemma_list is None:
+            start, end = self._wordnet.arrays['lemma_indptr'][self._id:self._id + 2]
+            self._lemma_list = [self._wordnet.lemma_by_id(j) for j in range(int(start), int(end))]
+        return self._lemma_list
+
+    @property
+    def _pointers(self) -> dict:
+        """ dict(symbol:list(ID)), the synset pointers sorted by target name. """
+        if self._pointer_ids is None:
+            arrays = self._wordnet.arrays
+            start, end = arrays['relation_indptr'][self._id:self._id + 2]
+            self._pointer_ids = {}
+            for code, target in zip(arrays['relation_symbol'][start:end].tolist(),
+                                    arrays['relation_target'][start:end].tolist()):
+                self._pointer_ids.setdefault(self._wordnet.symbols[code], []).append(target)
+        return self._pointer_ids
+
+    def _related(self, relation_symbol, sort=True):
+        return [self._wordnet.synset_by_id(i) for i in self._pointers.get(relation_symbol, [])]
+
+
+class SnapshotLemma(Lemma):
+    """
+    A lemma of a SnapshotWordNet, with its sense key and count precompiled.
+    """
+
+    def __init__(self, wordnet: "SnapshotWordNet", j: int, synset: SnapshotSynset):
+        arrays = wordnet.arrays
+        marker = int(arrays['lemma_marker'][j])
+        super().__init__(wordnet.string(arrays['lemma_name'][j]), int(arrays['synset_lexname'][synset._id]),
+                         int(arrays['lemma_lex_id'][j]), None if marker == NO_STRING else wordnet.string(marker),
+                         synset_offset=synset._offset, synset_pos=synset._pos, synset_name=synset._name)
+        self._wordnet = wordnet
+        self._id = j
+        self._synset = synset
+        self._key = wordnet.string(arrays['lemma_key'][j])
+        self._count = int(arrays['lemma_count'][j])
+
+    def __repr__(self):
+        return "Lemma('%s.%s')" % (self._synset_name, self._name)
+
+    def __reduce__(self):
+        return _unpickle_lemma, ('{}.{}'.format(self._synset_name, self._name),)
+
+    def _related(self, relation_symbol):
+        arrays = self._wordnet.arrays
+        start, end = arrays['lemma_relation_indptr'][self._id:self._id + 2]
+        return [self._wordnet.lemma_by_id(target)
+                for code, target in zip(arrays['lemma_relation_symbol'][start:end].tolist(),
+                                        arrays['lemma_relation_target'][start:end].tolist())
+                if self._wordnet.symbols[code] == relation_symbol]
+
+
+class SnapshotWordNet(WordNetPaths, InformationContentSimilarities):
+    """
+    WordNet read from a snapshot file, see the module docstring for the format.
+
+    :param path: String, the path of the snapshot.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as fin:
+            self.buffer = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = SNAPSHOT_HEADER_STRUCT.unpack_from(self.buffer, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError('{} is not a WordNet snapshot'.format(path))
+        header_start = SNAPSHOT_HEADER_STRUCT.size
+        header = json.loads(self.buffer[header_start:header_start + header_length].decode('utf8'))
+        data_start = _align_to_8(header_start + header_length)
+        self._version = header['version']
+        self.symbols = header['symbols']
+        self.arrays = {name: np.frombuffer(self.buffer, dtype=dtype, count=count, offset=data_start + offset)
+                       for name, (offset, count, dtype) in header['arrays'].items()}
+        self._string_indptr = self.arrays['string_indptr']
+        self._string_data = self.arrays['string_data']
+        self._slot_mask = len(self.arrays['index_slots']) - 1
+        self._synsets = {}
+        self._lemmas = {}
+        self._entries = {}
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(path)
+
+    def __len__(self):
+        return len(self.arrays['synset_pos'])
+
+    def __repr__(self):
+        return 'SnapshotWordNet({!r})'.format(self.path)
+
+    def string(self, string_id: int) -> str:
+        """ Returns a string of the string table. """
+        start, end = self._string_indptr[string_id:string_id + 2]
+        return self._string_data[start:end].tobytes().decode('utf8')
+
+    def synset_by_id(self, i: int) -> SnapshotSynset:
+        """ Returns a synset by ID, the same object for every lookup. """
+        synset = self._synsets.get(i)
+        if synset is None:
+            synset = self._synsets[i] = SnapshotSynset(self, i)
+        return synset
+
+    def lemma_by_id(self, j: int) -> SnapshotLemma:
+        """ Returns a lemma by its index in the lemma arrays. """
+        lemma = self._lemmas.get(j)
+        if lemma is None:
+            i = int(np.searchsorted(self.arrays['lemma_indptr'], j, side='right')) - 1
+            lemma = self._lemmas[j] = SnapshotLemma(self, j, self.synset_by_id(i))
+        return lemma
+
+    def _index_entry(self, form: str):
+        """ Returns the entry of a lemma form in the index, None if it isn't a lemma. """
+        if form in self._entries:
+            return self._entries[form]
+        slots, index_form = self.arrays['index_slots'], self.arrays['index_form']
+        slot = _form_hash(form) & self._slot_mask
+        entry = None
+        while slots[slot]:
+            if self.string(index_form[slots[slot] - 1]) == form:
+                entry = int(slots[slot]) - 1
+                break
+            slot = (slot + 1) & self._slot_mask
+        # morphy tries the same forms again and again.
+        self._entries[form] = entry
+        return entry
+
+    def _index_ids(self, form: str, pos: str) -> list:
+        """ Returns the IDs of the synsets of an index.* line, in its order. """
+        entry = self._index_entry(form)
+        if entry is None:
+            return []
+        column = entry * len(INDEX_POS) + _index_column(pos)
+        start, end = self.arrays['index_indptr'][column:column + 2]
+        return self.arrays['index_synsets'][start:end].tolist()
+
+    def _has_form(self, form: str, pos: str) -> bool:
+        entry = self._index_entry(form)
+        if entry is None:
+            return False
+        column = entry * len(INDEX_POS) + _index_column(pos)
+        indptr = self.arrays['index_indptr']
+        return indptr[column] < indptr[column + 1]
+
+    def _morphy(self, form: str, pos: str, check_exceptions=True) -> list:
+        """ The base forms of a form, like wn.morphy._morphy(). """
+        substitutions = MORPHOLOGICAL_SUBSTITUTIONS[pos]
+
+        def apply_rules(forms):
+            return [form[:-len(old)] + new
+                    for form in forms
+                    for old, new in substitutions
+                    if form.endswith(old)]
+
+        def filter_forms(forms):
+            result = []
+            for form in forms:
+                if form not in result and self._has_form(form, pos):
+                    result.append(form)
+            return result
+
+        if check_exceptions and form in exception_map[pos]:
+            return filter_forms([form] + exception_map[pos][form])
+        forms = apply_rules([form])
+        results = filter_forms([form] + forms)
+        if results:
+            return results
+        while forms:
+            forms = apply_rules(forms)
+            results = filter_forms(forms)
+            if results:
+                return results
+        return []
+
+    def morphy(self, form: str, pos: str = None, check_exceptions=True) -> str:
+        """ Returns the first base form of a form, None if there is none. """
+        if pos is None:
+            analyses = chain.from_iterable(self._morphy(form, p) for p in POS_LIST)
+        else:
+            analyses = self._morphy(form, pos, check_exceptions)
+        return next(islice(analyses, 1), None)
+
+    def synsets(self, lemma: str, pos: str = None, lang='eng', check_exceptions=True) -> list:
+        """
+        Returns the synsets of a word, like wn.WordNet.synsets().
+
+        :param pos: String, one of 'n', 'v', 'a', 's', 'r', None for all of them.
+        """
+        if lang != 'eng':
+            raise WordNetError('A WordNet snapshot only holds the English WordNet')
+        lemma = lemma.lower()
+        synset_pos = self.arrays['synset_pos']
+        result = []
+        for p in (POS_LIST if pos is None else [pos]):
+            form = self.morphy(lemma, p, check_exceptions)
+            if form is None:
+                continue
+            code = POS_LIST.index(p)
+            # Adjectives and satellites share an index, both are kept when asked for.
+            result.extend(self.synset_by_id(i) for i in self._index_ids(form, p)
+                          if pos in ('a', 's') or synset_pos[i] == code)
+        return result
+
+    def synset_from_pos_and_offset(self, pos: str, offset: int) -> SnapshotSynset:
+        if pos not in POS_LIST:
+            raise WordNetError('Part-of-Speech should be one of this: {}'.format(POS_LIST))
+        key = _OFFSET_GROUPS[pos] << 32 | int(offset)
+        keys = self.arrays['offset_keys']
+        row = int(np.searchsorted(keys, key))
+        if row == len(keys) or keys[row] != key:
+            raise WordNetError('Part-of-Speech and Offset combination not found in WordNet: {} + {}'.format(pos, offset))
+        return self.synset_by_id(int(self.arrays['offset_ids'][row]))
+
+    def synset(self, lemma_pos_index: str) -> SnapshotSynset:
+        """ Returns a synset by name, e.g. 'dog.n.01', like wn.WordNet.synset(). """
+        lemma, pos, synset_index = lemma_pos_index.lower().rsplit('.', 2)
+        ids = self._index_ids(lemma, pos) if pos in POS_LIST else []
+        if not ids:
+            raise WordNetError('no lemma %r with part of speech %r' % (lemma, pos))
+        try:
+            synset = self.synset_by_id(ids[int(synset_index) - 1])
+        except IndexError:
+            raise WordNetError('lemma %r with part of speech %r has only %i senses' % (lemma, pos, len(ids)))
+        if pos == 's' and synset._pos == 'a':
+            raise WordNetError('adjective satellite requested but only plain adjective found for lemma %r' % lemma)
+        elif pos == 'a' and synset._pos == 's':
+            warnings.warn('plain adjective requested but only adjective satellite found for lemma %r' % lemma)
+        return synset
+
+    def all_synsets(self, pos: str = None):
+        """ Iterates over the synsets of a POS, or of all of them, in ID order. """
+        if pos is None:
+            ids = range(len(self))
+        else:
+            ids = np.flatnonzero(self.arrays['synset_pos'] == POS_LIST.index(pos)).tolist()
+        for i in ids:
+            yield self.synset_by_id(i)
+
+    def all_lemma_names(self, pos: str = None, lang='eng'):
+        """ Iterates over the lemma forms of the index, sorted. """
+        if lang != 'eng':
+            raise WordNetError('A WordNet snapshot only holds the English WordNet')
+        for string_id in self.arrays['index_form'].tolist():
+            if pos is None or self._has_form(self.string(string_id), pos):
+                yield self.string(string_id)
+
+    def lemma(self, name: str, lang='eng') -> SnapshotLemma:
+        """ Returns a lemma by name, e.g. 'dog.n.01.dog'. """
+        separator = _SENSENUM_RE.search(name).end()
+        synset_name, lemma_name = name[:separator - 1], name[separator:]
+        for lemma in self.synset(synset_name).lemmas():
+            if lemma._name == lemma_name:
+                return lemma
+        raise WordNetError('no lemma %r in %r' % (lemma_name, synset_name))
+
+    def version(self) -> str:
+        return self._version
+
+    def _compute_max_depth(self, pos, simulate_root):
+        from wn import WordNet
+        # The depths of the known versions are constants of wn.
+        return WordNet._compute_max_depth(self, pos, simulate_root)
+
+
+def _unpickle_synset(name: str):
+    from pywsd.lexicon import get_wordnet
+    return get_wordnet().synset(name)
+
+
+def _unpickle_lemma(name: str):
+    from pywsd.lexicon import get_wordnet
+    return get_wordnet().lemma(name)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Compile the WordNet of wn into a snapshot file.')
+    parser.add_argument('path', help='path of the snapshot to write')
+    args = parser.parse_args()
+    number = compile_snapshot(args.path)
+    print('{} synsets written to {}'.format(number, args.path))
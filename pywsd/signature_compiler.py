@@ -0,0 +1,95 @@
+#!/usr/bin/env python -*- coding: utf-8 -*-
+#
+# Python Word Sense Disambiguation (pyWSD): Signature compiler
+#
+# Copyright (C) 2014-2020 alvations
+# URL:
+# For license information, see LICENSE.md
+
+"""
+Builds the original, adapted and simple signatures of every synset from
+WordNet (the `from_cache=False` path of synset_signatures) across a process
+pool, and writes them as a SignatureStore read by the Lesk cache loader.
+
+    $ python -m pywsd.signature_compiler pywsd/data/signatures --processes 8
+"""
+
+import multiprocessing
+import sys
+import time
+from itertools import chain
+
+from pywsd import lesk
+from pywsd.lexicon import get_wordnet
+from pywsd.signature_store import write_signature_store
+from pywsd.utils import get_lemma_cache, save_lemma_cache
+
+
+def compile_synset(pos_offset: tuple) -> tuple:
+    """
+    Builds the three signatures of a synset.
+
+    :param pos_offset: Tuple of the POS and the offset of the synset.
+    :return: Tuple (pos, offset, dict(signature_type:set(str))).
+    """
+    pos, offset = pos_offset
+    ss = get_wordnet().synset_from_pos_and_offset(pos, offset)
+    signature = {'original': lesk.synset_signatures(ss, original_lesk=True, from_cache=False),
+                 'adapted': lesk.synset_signatures(ss, adapted=True, from_cache=False),
+                 'simple': lesk.synset_signatures(ss, from_cache=False)}
+    return pos, offset, signature
+
+
+def compile_synsets(pos_offsets: list) -> list:
+    """
+    Builds the signatures of a chunk of synsets, then saves the new lemmas,
+    the workers of a pool exit without saving them.
+
+    :param pos_offsets: List of tuples of the POS and the offset of the synsets.
+    :return: List of compile_synset() of each synset.
+    """
+    signatures = [compile_synset(pos_offset) for pos_offset in pos_offsets]
+    save_lemma_cache()
+    return signatures
+
+
+def compile_signatures(directory: str, synsets=None, processes: int = None, chunksize: int = 256) -> int:
+    """
+    Builds the signatures of synsets and writes them as a SignatureStore.
+
+    :param directory: String, the directory of the store to write.
+    :param synsets: Iterable of synsets of the WordNet of pyWSD (see
+        pywsd.lexicon), all of them by default. The workers look them up by
+        POS and offset, so synsets of another WordNet are refused.
+    :param processes: Integer, the size of the pool, the number of CPUs by default.
+    :param chunksize: Integer, the number of synsets sent to a worker at once.
+    :return: The number of synsets written.
+    """
+    # Loaded before forking so that the workers share them. The signature
+    # words repeat across synsets and lemmatize() memoizes them.
+    wordnet = get_wordnet()
+    get_lemma_cache()
+    if synsets is None:
+        synsets = wordnet.all_synsets()
+    tasks = []
+    for ss in synsets:
+        if wordnet.synset_from_pos_and_offset(ss.pos(), ss.offset()) != ss:
+            raise ValueError('{} is not a synset of the WordNet of pyWSD, see pywsd.lexicon.set_wordnet'.format(ss))
+        tasks.append((ss.pos(), ss.offset()))
+    chunks = [tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)]
+    with multiprocessing.Pool(processes) as pool:
+        # The signatures are streamed into the store, the pool keeps them in order.
+        return write_signature_store(directory, chain.from_iterable(pool.imap(compile_synsets, chunks)))
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Build the Lesk signatures of every WordNet synset.')
+    parser.add_argument('directory', help='directory of the signature store to write')
+    parser.add_argument('--processes', type=int, default=None, help='size of the pool, the number of CPUs by default')
+    parser.add_argument('--chunksize', type=int, default=256, help='number of synsets sent to a worker at once')
+    args = parser.parse_args()
+    start = time.time()
+    number = compile_signatures(args.directory, processes=args.processes, chunksize=args.chunksize)
+    print('{} synsets written to {} in {:.0f} secs.'.format(number, args.directory, time.time() - start),
+          file=sys.stderr)
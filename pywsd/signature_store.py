@@ -0,0 +1,444 @@
+#!/usr/bin/env python -*- coding: utf-8 -*-
+#
+# Python Word Sense Disambiguation (pyWSD): Compact signature store
+#
+# Copyright (C) 2014-2020 alvations
+# URL:
+# For license information, see LICENSE.md
+
+"""
+Memory mapped store of the original, adapted and simple Lesk signatures.
+
+A store is a directory whose `CURRENT` file names the version in use, a
+subdirectory (`version-000001`, ...) with a `vocabulary.txt` file, which
+holds one token per line so a token ID is its line number, and one shard
+per POS (`n.sig`, `v.sig`, `a.sig`, `s.sig`, `r.sig`). A new version is
+written aside and `CURRENT` is then replaced in one rename, so a reader
+never pairs the vocabulary of a version with the shards of another. A
+store without `CURRENT` holds its files at the top of the directory. A shard holds the sorted offsets of
+its synsets and, for every signature type, the token IDs of all the
+signatures in CSR arrays: the IDs of the i-th synset are
+`indices[indptr[i]:indptr[i + 1]]`.
+
+The shards are only mapped when a synset of their POS is first looked up,
+and the arrays are read straight from the page cache, so the processes
+using the same store share its memory.
+
+Signature words can be added without rewriting the shards: each addition
+is written as a new append-only overlay segment (`overlay-000001.jsonl`,
+...), whose words are merged with the shards at lookup time. Compaction
+folds the overlay segments back into the shards.
+
+    $ python -m pywsd.signature_store convert signatures.pkl pywsd/data/signatures
+    $ python -m pywsd.signature_store compact pywsd/data/signatures
+"""
+
+import json
+import mmap
+import os
+import shutil
+import struct
+
+import numpy as np
+
+SIGNATURE_TYPES = ('original', 'adapted', 'simple')
+SHARD_POS = ('n', 'v', 'a', 's', 'r')
+SHARD_MAGIC = b'PYWSDSG1'
+SHARD_HEADER_STRUCT = struct.Struct('<8sQ')
+VOCABULARY_FILENAME = 'vocabulary.txt'
+CURRENT_FILENAME = 'CURRENT'
+VERSION_PREFIX = 'version-'
+OVERLAY_PREFIX = 'overlay-'
+OVERLAY_SUFFIX = '.jsonl'
+
+
+def _align_to_8(position: int) -> int:
+    return (position + 7) // 8 * 8
+
+
+def _overlay_key(pos: str, offset: int) -> tuple:
+    # Adjective satellites share the offsets of the adjectives.
+    return 'a' if pos == 's' else pos, int(offset)
+
+
+class SignatureShard:
+    """
+    The signatures of the synsets of one POS, memory mapped from a shard file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as fin:
+            self.buffer = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = SHARD_HEADER_STRUCT.unpack_from(self.buffer, 0)
+        if magic != SHARD_MAGIC:
+            raise ValueError('{} is not a signature shard'.format(path))
+        header_start = SHARD_HEADER_STRUCT.size
+        header = json.loads(self.buffer[header_start:header_start + header_length].decode('utf8'))
+        data_start = _align_to_8(header_start + header_length)
+        self.pos = header['pos']
+        self.arrays = {name: np.frombuffer(self.buffer, dtype=dtype, count=count, offset=data_start + offset)
+                       for name, (offset, count, dtype) in header['arrays'].items()}
+        self.offsets = self.arrays['offsets']
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def row(self, offset: int) -> int:
+        """
+        Returns the row of a synset in the shard.
+
+        :param offset: Integer, the offset of the synset in WordNet.
+        """
+        row = int(np.searchsorted(self.offsets, offset))
+        if row == len(self.offsets) or self.offsets[row] != offset:
+            raise KeyError('{} {:08d}'.format(self.pos, offset))
+        return row
+
+    def token_ids(self, row: int, signature_type: str) -> np.ndarray:
+        """
+        Returns a read-only view of the token IDs of a signature.
+
+        :param row: Integer, the row of the synset in the shard.
+        :param signature_type: String, one of 'original', 'adapted', 'simple'.
+        """
+        indptr = self.arrays[signature_type + '_indptr']
+        return self.arrays[signature_type + '_indices'][indptr[row]:indptr[row + 1]]
+
+
+class SignatureStore:
+    """
+    The Lesk signatures of every synset, see the module docstring for the format.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._version_directory = None
+        self._vocabulary = None
+        self._shards = {}
+        self._overlay = None
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return os.path.exists(os.path.join(current_version(directory), VOCABULARY_FILENAME))
+
+    @property
+    def version_directory(self) -> str:
+        """
+        The directory of the vocabulary and shards, the version is read once
+        so that they all come from the same one.
+        """
+        if self._version_directory is None:
+            self._version_directory = current_version(self.directory)
+        return self._version_directory
+
+    @property
+    def vocabulary(self) -> list:
+        """ The tokens, indexed by their ID. """
+        if self._vocabulary is None:
+            # Only '\n' ends a token, a '\r' is part of it.
+            with open(os.path.join(self.version_directory, VOCABULARY_FILENAME),
+                      encoding='utf8', newline='\n') as fin:
+                self._vocabulary = fin.read().split('\n')[:-1]
+        return self._vocabulary
+
+    @property
+    def overlay(self) -> dict:
+        """
+        The words added by the overlay segments, read the first time they
+        are needed: dict((pos, offset):dict(signature_type:set(str))).
+        """
+        if self._overlay is None:
+            self._overlay = {}
+            for path in overlay_segments(self.directory):
+                read_overlay_segment(path, self._overlay)
+        return self._overlay
+
+    def add_overlay(self, synset_signatures) -> str:
+        """
+        Adds signature words as a new overlay segment, the shards are left
+        untouched.
+
+        :param synset_signatures: Iterable of (pos, offset, dict(signature_type:iterable(str))).
+        :return: The path of the segment written.
+        """
+        path = write_overlay_segment(self.directory, synset_signatures)
+        if self._overlay is not None:
+            read_overlay_segment(path, self._overlay)
+        return path
+
+    def shard(self, pos: str) -> SignatureShard:
+        """ Returns the shard of a POS, it is mapped the first time it is needed. """
+        if pos not in self._shards:
+            self._shards[pos] = SignatureShard(os.path.join(self.version_directory, pos + '.sig'))
+        return self._shards[pos]
+
+    def token_ids(self, ss: "wn.Synset", signature_type: str) -> np.ndarray:
+        """
+        Returns a read-only view of the token IDs of the signature of a synset
+        in the shards, the overlay segments are not included.
+
+        :param ss: An instance of wn.Synset (or nltk.corpus.wordnet.Synset).
+        :param signature_type: String, one of 'original', 'adapted', 'simple'.
+        """
+        pos, offset = ss.pos(), ss.offset()
+        shard = self.shard(pos)
+        try:
+            row = shard.row(offset)
+        except KeyError:
+            # Adjective satellites may be typed 'a' or 's' depending on the WordNet API.
+            if pos not in ('a', 's'):
+                raise
+            shard = self.shard('s' if pos == 'a' else 'a')
+            row = shard.row(offset)
+        return shard.token_ids(row, signature_type)
+
+    def signature(self, ss: "wn.Synset", signature_type: str) -> set:
+        """
+        Returns the signature of a synset as a set of strings, including the
+        words of the overlay segments.
+
+        :param ss: An instance of wn.Synset (or nltk.corpus.wordnet.Synset).
+        :param signature_type: String, one of 'original', 'adapted', 'simple'.
+        """
+        added = self.overlay.get(_overlay_key(ss.pos(), ss.offset()))
+        try:
+            token_ids = self.token_ids(ss, signature_type).tolist()
+        except KeyError:
+            if added is None:
+                raise
+            token_ids = []  # A synset which is only in the overlay segments.
+        vocabulary = self.vocabulary
+        signature = {vocabulary[token_id] for token_id in token_ids}
+        return signature.union(added[signature_type]) if added else signature
+
+    def items(self):
+        """
+        Iterates over the signatures of every synset, with the words of the
+        overlay segments merged.
+
+        :return: Iterator of (pos, offset, dict(signature_type:set(str))).
+        """
+        vocabulary = self.vocabulary
+        overlay = self.overlay
+        in_shards = set()
+        for pos in SHARD_POS:
+            shard = self.shard(pos)
+            for row, offset in enumerate(shard.offsets.tolist()):
+                key = _overlay_key(pos, offset)
+                in_shards.add(key)
+                signature = {signature_type: {vocabulary[token_id]
+                                              for token_id in shard.token_ids(row, signature_type).tolist()}
+                             for signature_type in SIGNATURE_TYPES}
+                for signature_type, words in overlay.get(key, {}).items():
+                    signature[signature_type] |= words
+                yield pos, offset, signature
+        for (pos, offset), signature in overlay.items():
+            if (pos, offset) not in in_shards:
+                yield pos, offset, signature
+
+
+def write_shard(path: str, pos: str, offsets: list, signatures: dict):
+    """
+    Writes the signatures of the synsets of one POS into a shard file.
+
+    :param path: String, the path of the shard to write.
+    :param pos: String, the POS of the synsets.
+    :param offsets: list(int), the offsets of the synsets, in any order.
+    :param signatures: dict(signature_type:list(list(int))), the token IDs of
+        the signature of each synset, in the order of the offsets.
+    """
+    order = np.argsort(np.array(offsets, dtype=np.int64), kind='stable')
+    arrays = {'offsets': np.array(offsets, dtype='<u4')[order]}
+    for signature_type in SIGNATURE_TYPES:
+        rows = [signatures[signature_type][i] for i in order]
+        indptr = np.zeros(len(rows) + 1, dtype='<i8')
+        np.cumsum([len(row) for row in rows], out=indptr[1:])
+        arrays[signature_type + '_indptr'] = indptr
+        arrays[signature_type + '_indices'] = np.fromiter((token_id for row in rows for token_id in row),
+                                                          dtype='<u4', count=int(indptr[-1]))
+
+    layout, position = {}, 0
+    for name, array in arrays.items():
+        layout[name] = [position, len(array), array.dtype.str]
+        position = _align_to_8(position + array.nbytes)
+    header = json.dumps({'pos': pos, 'arrays': layout}).encode('utf8')
+    header_end = SHARD_HEADER_STRUCT.size + len(header)
+
+    with open(path, 'wb') as fout:
+        fout.write(SHARD_HEADER_STRUCT.pack(SHARD_MAGIC, len(header)))
+        fout.write(header)
+        fout.write(b'\0' * (_align_to_8(header_end) - header_end))
+        for array in arrays.values():
+            fout.write(array.tobytes())
+            fout.write(b'\0' * (_align_to_8(array.nbytes) - array.nbytes))
+
+
+def current_version(directory: str) -> str:
+    """
+    Returns the directory of the version of a store in use, the store
+    directory itself when it has no `CURRENT` file.
+    """
+    try:
+        with open(os.path.join(directory, CURRENT_FILENAME), encoding='utf8') as fin:
+            return os.path.join(directory, fin.read().strip())
+    except FileNotFoundError:
+        return directory
+
+
+def signature_versions(directory: str) -> list:
+    """ Returns the directories of the versions of a store, oldest first. """
+    return sorted(os.path.join(directory, filename) for filename in os.listdir(directory)
+                  if filename.startswith(VERSION_PREFIX))
+
+
+def write_signature_store(directory: str, synset_signatures) -> int:
+    """
+    Writes a new version of a signature store and makes it the current one.
+    The version it replaces is kept for the SignatureStore objects already
+    opened on it, the older ones are removed.
+
+    :param directory: String, the directory of the store, created if needed.
+    :param synset_signatures: Iterable of (pos, offset, dict(signature_type:iterable(str))).
+    :return: The number of synsets written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    numbers = [int(os.path.basename(path)[len(VERSION_PREFIX):]) for path in signature_versions(directory)]
+    version = '{}{:06d}'.format(VERSION_PREFIX, max(numbers, default=0) + 1)
+    version_directory = os.path.join(directory, version)
+    os.makedirs(version_directory)
+    try:
+        number = _write_signature_version(version_directory, synset_signatures)
+    except BaseException:
+        shutil.rmtree(version_directory)
+        raise
+
+    previous = current_version(directory)
+    pointer = os.path.join(directory, '{}.{}.tmp'.format(CURRENT_FILENAME, version))
+    with open(pointer, 'w', encoding='utf8') as fout:
+        fout.write(version + '\n')
+    os.replace(pointer, os.path.join(directory, CURRENT_FILENAME))
+
+    for path in signature_versions(directory):
+        if path not in (version_directory, previous):
+            shutil.rmtree(path)
+    if previous != directory:
+        # The files of a store written before the versions.
+        for filename in [VOCABULARY_FILENAME] + [pos + '.sig' for pos in SHARD_POS]:
+            if os.path.exists(os.path.join(directory, filename)):
+                os.remove(os.path.join(directory, filename))
+    return number
+
+
+def _write_signature_version(directory: str, synset_signatures) -> int:
+    token_ids = {}
+    shards = {pos: ([], {signature_type: [] for signature_type in SIGNATURE_TYPES}) for pos in SHARD_POS}
+    for pos, offset, signature in synset_signatures:
+        offsets, rows = shards[pos]
+        offsets.append(offset)
+        for signature_type in SIGNATURE_TYPES:
+            # Sorted so that a signature is the same whatever the order of its set.
+            rows[signature_type].append(sorted(token_ids.setdefault(token, len(token_ids))
+                                               for token in set(signature[signature_type])))
+
+    with open(os.path.join(directory, VOCABULARY_FILENAME), 'w', encoding='utf8', newline='\n') as fout:
+        for token in token_ids:
+            if '\n' in token:
+                raise ValueError('Signature token {!r} contains a newline'.format(token))
+            fout.write(token + '\n')
+    for pos, (offsets, rows) in shards.items():
+        write_shard(os.path.join(directory, pos + '.sig'), pos, offsets, rows)
+    return sum(len(offsets) for offsets, _ in shards.values())
+
+
+def overlay_segments(directory: str) -> list:
+    """ Returns the paths of the overlay segments of a store, oldest first. """
+    return sorted(os.path.join(directory, filename) for filename in os.listdir(directory)
+                  if filename.startswith(OVERLAY_PREFIX) and filename.endswith(OVERLAY_SUFFIX))
+
+
+def write_overlay_segment(directory: str, synset_signatures) -> str:
+    """
+    Writes signature words as the next overlay segment of a store.
+
+    :param directory: String, the directory of the store.
+    :param synset_signatures: Iterable of (pos, offset, dict(signature_type:iterable(str))).
+    :return: The path of the segment written.
+    """
+    numbers = [int(os.path.basename(path)[len(OVERLAY_PREFIX):-len(OVERLAY_SUFFIX)])
+               for path in overlay_segments(directory)]
+    path = os.path.join(directory, '{}{:06d}{}'.format(OVERLAY_PREFIX, max(numbers, default=0) + 1,
+                                                       OVERLAY_SUFFIX))
+    # Written aside then renamed, so that a reader never sees half a segment.
+    with open(path + '.tmp', 'w', encoding='utf8') as fout:
+        for pos, offset, signature in synset_signatures:
+            entry = {'pos': pos, 'offset': int(offset)}
+            entry.update({signature_type: sorted(set(signature.get(signature_type, ())))
+                          for signature_type in SIGNATURE_TYPES})
+            fout.write(json.dumps(entry) + '\n')
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def read_overlay_segment(path: str, overlay: dict) -> dict:
+    """
+    Merges the words of an overlay segment into an overlay dictionary.
+
+    :param overlay: dict((pos, offset):dict(signature_type:set(str))).
+    :return: The overlay dictionary.
+    """
+    with open(path, encoding='utf8') as fin:
+        for line in fin:
+            entry = json.loads(line)
+            signature = overlay.setdefault(_overlay_key(entry['pos'], entry['offset']),
+                                           {signature_type: set() for signature_type in SIGNATURE_TYPES})
+            for signature_type in SIGNATURE_TYPES:
+                signature[signature_type].update(entry[signature_type])
+    return overlay
+
+
+def compact_signature_store(directory: str) -> int:
+    """
+    Folds the overlay segments of a store into a new version of its shards
+    and removes them. The SignatureStore objects already opened on the
+    directory keep reading the previous version until they are opened again.
+
+    :param directory: String, the directory of the store.
+    :return: The number of synsets written.
+    """
+    segments = overlay_segments(directory)
+    number = write_signature_store(directory, SignatureStore(directory).items())
+    for path in segments:
+        os.remove(path)
+    return number
+
+
+def signatures_from_pickle(picklefile: str):
+    """
+    Reads the legacy pandas pickle of signatures, keyed by synset name.
+
+    :return: Iterator of (pos, offset, dict(signature_type:set(str))).
+    """
+    import pandas as pd
+    from pywsd.lexicon import get_wordnet
+    wordnet = get_wordnet()
+    for name, signature in pd.read_pickle(picklefile).items():
+        ss = wordnet.synset(name)
+        yield ss.pos(), ss.offset(), signature
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Build or compact a signature store.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('convert', help='convert the signatures pickle into a signature store')
+    convert.add_argument('picklefile', help='path of the signatures pickle')
+    convert.add_argument('directory', help='directory of the store to write')
+    compact = commands.add_parser('compact', help='fold the overlay segments of a store into its shards')
+    compact.add_argument('directory', help='directory of the store')
+    args = parser.parse_args()
+    if args.command == 'convert':
+        number = write_signature_store(args.directory, signatures_from_pickle(args.picklefile))
+    else:
+        number = compact_signature_store(args.directory)
+    print('{} synsets written to {}'.format(number, args.directory))
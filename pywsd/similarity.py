@@ -10,13 +10,50 @@
 WSD by maximizing similarity.
 """
 
+import heapq
+import math
+from functools import lru_cache
+
+import numpy as np
+from wn.constants import WN_MAX_DEPTH
 from wn.info import WordNetInformationContent as WordNetIC
 
+from pywsd.hypernyms import SharedAncestry, get_hypernym_table
+from pywsd.infocontent import IC_POS, get_information_content
+from pywsd.instrumentation import timed
 from pywsd.tokenize import word_tokenize
 from pywsd.utils import lemmatize
 
-wnic_bnc_resnik_add1 = WordNetIC('bnc', resnik=True, add1=True)
-wnic_bnc_add1 = WordNetIC('bnc', resnik=False, add1=True)
+# Map from the option names to the measures.
+SIMILARITY_MEASURES = {'path': 'path', 'path_similarity': 'path',
+                       'wup': 'wup', 'wupa': 'wup', 'wu-palmer': 'wup',
+                       'lch': 'lch', 'leacock-chordorow': 'lch',
+                       'res': 'res', 'resnik': 'res',
+                       'jcn': 'jcn', 'jiang-conrath': 'jcn',
+                       'lin': 'lin'}
+SIMILARITY_OPTIONS = ('path', 'wup', 'lch', 'res', 'jcn', 'lin')
+SIMILARITY_CACHE_SIZE = 2 ** 17
+# Number of context lemmas scored before the first pruning, doubled after each.
+PRUNING_BLOCK = 8
+# Largest score a context word can add to a sense, for the measures which
+# are bounded: lch is at most -log(1 / (2 * depth)) for the deepest taxonomy.
+SIMILARITY_BOUNDS = {'path': 1.0, 'wup': 1.0,
+                     'lch': max(-math.log(1 / (2.0 * depth)) for depths in WN_MAX_DEPTH['3.0'].values()
+                                for depth in depths.values() if depth)}
+
+_information_contents = {}
+
+
+def information_content(resnik: bool) -> WordNetIC:
+    """
+    Returns the BNC information content (add1 smoothing) of the `wn` library,
+    only read for synsets which aren't in the information content tables.
+
+    :param resnik: Boolean, whether to use the Resnik counts.
+    """
+    if resnik not in _information_contents:
+        _information_contents[resnik] = WordNetIC('bnc', resnik=resnik, add1=True)
+    return _information_contents[resnik]
 
 
 def similarity_by_path(sense1: "wn.Synset", sense2: "wn.Synset", option: str = "path") -> float:
@@ -28,6 +65,19 @@ def similarity_by_path(sense1: "wn.Synset", sense2: "wn.Synset", option: str = "
     :param option: String, one of ('path', 'wup', 'lch').
     :return: A float, similarity measurement.
     """
+    table = get_hypernym_table()
+    if sense1.name() in table.index and sense2.name() in table.index:
+        i, j = table.id(sense1), table.id(sense2)
+        if option.lower() in ["path", "path_similarity"]:  # Path similarities.
+            return max(table.path_similarity(i, j), table.path_similarity(j, i))
+        elif option.lower() in ["wup", "wupa", "wu-palmer", "wu-palmer"]:  # Wu-Palmer
+            return max(table.wup_similarity(i, j), table.wup_similarity(j, i))
+        elif option.lower() in ['lch', "leacock-chordorow"]:  # Leacock-Chodorow
+            if sense1.pos() != sense2.pos():  # lch can't do diff POS
+                return 0
+            return table.lch_similarity(i, j)
+
+    # Synsets which aren't in the hypernym tables walk the hypernym graph.
     if option.lower() in ["path", "path_similarity"]:  # Path similarities.
         return max(wn.path_similarity(sense1, sense2, if_none_return=0),
                    wn.path_similarity(sense2, sense1, if_none_return=0))
@@ -35,7 +85,7 @@ def similarity_by_path(sense1: "wn.Synset", sense2: "wn.Synset", option: str = "
         return max(wn.wup_similarity(sense1, sense2, if_none_return=0),
                    wn.wup_similarity(sense2, sense1, if_none_return=0))
     elif option.lower() in ['lch', "leacock-chordorow"]:  # Leacock-Chodorow
-        if sense1.pos != sense2.pos:  # lch can't do diff POS
+        if sense1.pos() != sense2.pos():  # lch can't do diff POS
             return 0
         return wn.lch_similarity(sense1, sense2, if_none_return=0)
 
@@ -50,57 +100,252 @@ def similarity_by_infocontent(sense1: "wn.Synset", sense2: "wn.Synset", option:
     :return: A float, similarity measurement.
     """
 
-    if sense1.pos != sense2.pos:  # infocontent sim can't do diff POS.
+    if sense1.pos() != sense2.pos():  # infocontent sim can't do diff POS.
+        return 0
+    if sense1.pos() not in IC_POS:  # Only nouns and verbs have counts.
         return 0
 
-    if option in ['res', 'resnik']:
-        if sense1.pos not in wnic_bnc_resnik_add1.ic:
-            return 0
-        return wn.res_similarity(sense1, sense2, wnic_bnc_resnik_add1)
+    table = get_hypernym_table()
+    resnik = option in ['res', 'resnik']
+    if sense1.name() in table.index and sense2.name() in table.index:
+        measure = 'res' if resnik else 'jcn' if option in ['jcn', "jiang-conrath"] else 'lin'
+        return get_information_content(resnik).similarity(measure, table.id(sense1), table.id(sense2))
+
+    # Synsets which aren't in the hypernym tables walk the hypernym graph.
+    if resnik:
+        return wn.res_similarity(sense1, sense2, information_content(resnik=True))
     # return min(wn.res_similarity(sense1, sense2, wnic.ic(ic)) \
     #             for ic in info_contents)
 
     elif option in ['jcn', "jiang-conrath"]:
-        if sense1.pos not in wnic_bnc_add1.ic:
-            return 0
-        return wn.jcn_similarity(sense1, sense2, wnic_bnc_add1)
+        return wn.jcn_similarity(sense1, sense2, information_content(resnik=False))
 
     elif option in ['lin']:
-        if sense1.pos not in wnic_bnc_add1.ic:
-            return 0
-        return wn.lin_similarity(sense1, sense2, wnic_bnc_add1)
+        return wn.lin_similarity(sense1, sense2, information_content(resnik=False))
+
+
+def pair_similarity(measure: str, pair: frozenset) -> float:
+    """
+    Calculates the similarity of an unordered pair of senses, all the
+    measures are symmetric.
+
+    :param measure: String, one of ('path', 'wup', 'lch', 'res', 'jcn', 'lin').
+    :param pair: frozenset of one or two synsets.
+    :return: A float, similarity measurement.
+    """
+    sense1, sense2 = tuple(pair) if len(pair) == 2 else tuple(pair) * 2
+    if measure in ['path', 'wup', 'lch']:
+        return similarity_by_path(sense1, sense2, measure)
+    else:
+        return similarity_by_infocontent(sense1, sense2, measure)
+
+
+_cached_pair_similarity = lru_cache(maxsize=SIMILARITY_CACHE_SIZE)(pair_similarity)
+
+
+def similarity_cache_info():
+    """
+    Returns the hits, misses, maxsize and currsize of the similarity cache
+    of sim(), which is shared by all the calls of the process.
+    """
+    return _cached_pair_similarity.cache_info()
+
+
+def clear_similarity_cache():
+    """ Empties the similarity cache of sim() and resets its counters. """
+    _cached_pair_similarity.cache_clear()
+
+
+def set_similarity_cache_size(maxsize: int):
+    """
+    Replaces the similarity cache of sim() by an empty one.
+
+    :param maxsize: Integer, the number of pairs kept, None for no bound.
+    """
+    global _cached_pair_similarity
+    _cached_pair_similarity = lru_cache(maxsize=maxsize)(pair_similarity)
 
 
+@timed('sim')
 def sim(sense1: "wn.Synset", sense2: "wn.Synset", option: str = "path") -> float:
     """
-    Calculates similarity based on user's choice.
+    Calculates similarity based on user's choice. The similarities are kept
+    in a LRU cache keyed by the measure and the unordered pair of senses.
 
     :param sense1: A synset.
     :param sense2: A synset.
     :param option: String, one of ('path', 'wup', 'lch', 'res', 'jcn', 'lin').
     :return: A float, similarity measurement.
     """
-    option = option.lower()
-    if option.lower() in ["path", "path_similarity",
-                          "wup", "wupa", "wu-palmer", "wu-palmer",
-                          'lch', "leacock-chordorow"]:
-        return similarity_by_path(sense1, sense2, option)
-    elif option.lower() in ["res", "resnik",
-                            "jcn", "jiang-conrath",
-                            "lin"]:
-        return similarity_by_infocontent(sense1, sense2, option)
+    measure = SIMILARITY_MEASURES.get(option.lower())
+    if measure is None:
+        return None
+    return _cached_pair_similarity(measure, frozenset((sense1, sense2)))
+
+
+@timed('similarity_matrix')
+def similarity_matrix(senses: list, synsets: list, option: str = "path") -> np.ndarray:
+    """
+    Calculates sim() of every sense with every synset. The path, lch, res,
+    jcn and lin similarities are computed a row at a time from the hypernym
+    and information content tables, wup goes through the similarity cache of sim().
+
+    :param senses: List of synsets, the rows.
+    :param synsets: List of synsets, the columns.
+    :param option: String, one of ('path', 'wup', 'lch', 'res', 'jcn', 'lin').
+    :return: A len(senses) x len(synsets) float array.
+    """
+    measure = SIMILARITY_MEASURES.get(option.lower())
+    table = get_hypernym_table()
+    if measure in ['path', 'lch', 'res', 'jcn', 'lin'] and synsets \
+            and all(ss.name() in table.index for ss in senses + synsets):
+        return similarity_matrices(senses, synsets, [option])[option]
+    return np.array([[sim(sense, ss, option) for ss in synsets] for sense in senses],
+                    dtype=np.float64).reshape(len(senses), len(synsets))
+
+
+def sim_all(sense1: "wn.Synset", sense2: "wn.Synset") -> dict:
+    """
+    Calculates the six similarities of two senses at once: their common
+    ancestors are found once and every measure is derived from them.
+
+    :param sense1: A synset.
+    :param sense2: A synset.
+    :return: dict(measure:float), the sim() of each of SIMILARITY_OPTIONS.
+    """
+    table = get_hypernym_table()
+    if sense1.name() not in table.index or sense2.name() not in table.index:
+        return {measure: sim(sense1, sense2, measure) for measure in SIMILARITY_OPTIONS}
+    i, j = table.id(sense1), table.id(sense2)
+    common = table.common_ancestors(i, j)
+    same_pos = sense1.pos() == sense2.pos()
+    scores = {'path': max(table.path_similarity(i, j, common), table.path_similarity(j, i, common)),
+              'wup': max(table.wup_similarity(i, j, common), table.wup_similarity(j, i, common)),
+              'lch': table.lch_similarity(i, j, common) if same_pos else 0}
+    for measure in ['res', 'jcn', 'lin']:
+        if same_pos and sense1.pos() in IC_POS:
+            scores[measure] = get_information_content(measure == 'res').similarity(measure, i, j, common)
+        else:
+            scores[measure] = 0
+    return scores
+
+
+@timed('similarity_matrices')
+def similarity_matrices(senses: list, synsets: list, options=SIMILARITY_OPTIONS) -> dict:
+    """
+    Calculates similarity_matrix() for several measures at once, the common
+    ancestors of each sense with the synsets are gathered once for a row.
+
+    :param senses: List of synsets, the rows.
+    :param synsets: List of synsets, the columns.
+    :param options: Iterable of the measures, all of SIMILARITY_OPTIONS by default.
+    :return: dict(option:array), a len(senses) x len(synsets) float array per option.
+    """
+    table = get_hypernym_table()
+    if not synsets or not all(option.lower() in SIMILARITY_MEASURES for option in options) \
+            or not all(ss.name() in table.index for ss in senses + synsets):
+        return {option: similarity_matrix(senses, synsets, option) for option in options}
+    measures = {option: SIMILARITY_MEASURES[option.lower()] for option in options}
+    matrices = {measure: np.zeros((len(senses), len(synsets))) for measure in set(measures.values())}
+    js = np.array([table.id(ss) for ss in synsets], dtype=np.int64)
+    gathered = set(matrices) != {'wup'}
+    for row, sense in enumerate(senses):
+        i = table.id(sense)
+        ancestry = SharedAncestry(table, i, js) if gathered else None
+        for measure, matrix in matrices.items():
+            if measure == 'path':
+                matrix[row] = table.path_similarities(i, js, ancestry)
+            elif measure == 'lch':
+                matrix[row] = table.lch_similarities(i, js, ancestry)
+            elif measure == 'wup':  # The subsumers are ranked by depth and name, one pair at a time.
+                for column, j in enumerate(js.tolist()):
+                    common = table.common_ancestors(i, j)
+                    matrix[row, column] = max(table.wup_similarity(i, j, common), table.wup_similarity(j, i, common))
+            else:
+                matrix[row] = get_information_content(measure == 'res').similarities(measure, i, js, ancestry)
+    return {option: matrices[measure] for option, measure in measures.items()}
+
+
+def lemma_similarities(senses: list, lemma_synsets: list, option: str = "path") -> np.ndarray:
+    """
+    Calculates the max similarity of every sense with the synsets of every
+    lemma, floored at 0 (0 for the lemmas without synsets).
+
+    :param senses: List of synsets, the rows.
+    :param lemma_synsets: List of the lists of synsets of each lemma, the columns.
+    :param option: String, one of ('path', 'wup', 'lch', 'res', 'jcn', 'lin').
+    :return: A len(senses) x len(lemma_synsets) float array.
+    """
+    # A synset of several lemmas is scored once.
+    columns = list(dict.fromkeys(k for synsets in lemma_synsets for k in synsets))
+    column_index = {k: c for c, k in enumerate(columns)}
+    matrix = similarity_matrix(senses, columns, option)
+    scores = np.zeros((len(senses), len(lemma_synsets)))
+    for u, synsets in enumerate(lemma_synsets):
+        if synsets:
+            scores[:, u] = np.maximum(matrix[:, [column_index[k] for k in synsets]].max(axis=1), 0)
+    return scores
+
+
+def prune_senses(senses: list, lemma_synsets: list, tokens: list, option: str, n: int) -> tuple:
+    """
+    Branch and bound over the senses of max_similarity(): the lemmas are
+    scored in blocks, the most frequent first, and after each block the
+    senses whose upper bound (known score plus the bound of the measure for
+    every token left) is below the n-th best known score are dropped.
+
+    :param senses: List of synsets, the candidate senses.
+    :param lemma_synsets: List of the lists of synsets of each lemma.
+    :param tokens: List of the lemma index of each token of the context.
+    :param option: String, one of the SIMILARITY_BOUNDS measures.
+    :param n: Integer, the number of best senses wanted.
+    :return: Tuple (indices of the senses left, their lemma_similarities()).
+    """
+    bound = SIMILARITY_BOUNDS[SIMILARITY_MEASURES[option.lower()]]
+    counts = np.bincount(tokens, minlength=len(lemma_synsets))
+    # The lemmas without synsets add 0, they are known from the start.
+    order = [u for u in np.argsort(-counts, kind='stable').tolist() if lemma_synsets[u]]
+    scores = np.zeros((len(senses), len(lemma_synsets)))
+    known = np.zeros(len(senses))
+    remaining = int(counts[order].sum())
+    # The bounds are sums in another order than the scores, hence the margin.
+    tolerance = 1e-9 * (len(tokens) + 1)
+    kept = np.arange(len(senses))
+    start, size = 0, PRUNING_BLOCK
+    while start < len(order) and len(kept) > n:
+        block = order[start:start + size]
+        block_scores = lemma_similarities([senses[s] for s in kept], [lemma_synsets[u] for u in block], option)
+        scores[np.ix_(kept, block)] = block_scores
+        known[kept] += block_scores @ counts[block]
+        remaining -= int(counts[block].sum())
+        # At least n senses score as much as the n-th best known score.
+        threshold = np.partition(known[kept], -n)[-n]
+        kept = kept[known[kept] + bound * remaining >= threshold - tolerance]
+        start, size = start + size, 2 * size
+    if start < len(order):
+        block = order[start:]
+        scores[np.ix_(kept, block)] = lemma_similarities([senses[s] for s in kept],
+                                                         [lemma_synsets[u] for u in block], option)
+    return kept, scores[kept]
 
 
+@timed('max_similarity')
 def max_similarity(context_sentence: str, ambiguous_word: str, option="path",
-                   lemma=True, context_is_lemmatized=False, pos=None, best=True) -> "wn.Synset":
+                   lemma=True, context_is_lemmatized=False, pos=None, best=True,
+                   topn: int = None, prune=False) -> "wn.Synset":
     """
     Perform WSD by maximizing the sum of maximum similarity between possible
     synsets of all words in the context sentence and the possible synsets of the
     ambiguous words (see https://ibin.co/4gG9zUlejUUA.png):
     {argmax}_{synset(a)}(\sum_{i}^{n}{{max}_{synset(i)}(sim(i,a))}
 
-    :param context_sentence: String, a sentence.
+    :param context_sentence: String, a sentence. If context_is_lemmatized,
+        it can also be the list of lemmas itself.
     :param ambiguous_word: String, a single word.
+    :param topn: Integer, if not best, only the topn senses are ranked.
+    :param prune: Boolean, whether to skip the senses which can't be among
+        the best (or topn) ones, for the path, wup and lch options. It pays
+        off for wup, whose pairs are scored one at a time.
     :return: If best, returns only the best Synset, else returns a dict.
     """
     ambiguous_word = lemmatize(ambiguous_word)
@@ -108,7 +353,8 @@ def max_similarity(context_sentence: str, ambiguous_word: str, option="path",
     if not wn.synsets(ambiguous_word):
         return None
     if context_is_lemmatized:
-        context_sentence = word_tokenize(context_sentence)
+        if isinstance(context_sentence, str):
+            context_sentence = word_tokenize(context_sentence)
     else:
         context_sentence = [lemmatize(w) for w in word_tokenize(context_sentence)]
     #add to check the pos tag lead to an empty synsets
@@ -116,18 +362,26 @@ def max_similarity(context_sentence: str, ambiguous_word: str, option="path",
         ambiguousSynset = wn.synsets(ambiguous_word)
     else:
         ambiguousSynset = wn.synsets(ambiguous_word, pos=pos)
-    result = {}
-    for i in ambiguousSynset:
-        result[i] = 0
-        for j in context_sentence:
-            _result = [0]
-            for k in wn.synsets(j):
-                _result.append(sim(i, k, option))
-            result[i] += max(_result)
+    # Each distinct lemma is looked up and scored once, however often it occurs.
+    lemmas = list(dict.fromkeys(context_sentence))
+    lemma_synsets = [wn.synsets(j) for j in lemmas]
+    lemma_index = {j: u for u, j in enumerate(lemmas)}
+    tokens = [lemma_index[j] for j in context_sentence]
+    n = 1 if best else topn
+    if prune and n and option.lower() in SIMILARITY_MEASURES \
+            and SIMILARITY_MEASURES[option.lower()] in SIMILARITY_BOUNDS and len(ambiguousSynset) > n:
+        kept, lemma_scores = prune_senses(ambiguousSynset, lemma_synsets, tokens, option, n)
+        ambiguousSynset = [ambiguousSynset[s] for s in kept.tolist()]
+    else:
+        lemma_scores = lemma_similarities(ambiguousSynset, lemma_synsets, option)
+    # Summed in the order of the context (np.cumsum adds sequentially) rather
+    # than weighted by the lemma counts, so that the scores are the same floats.
+    scores = np.cumsum(lemma_scores[:, tokens], axis=1)[:, -1] if tokens else np.zeros(len(ambiguousSynset))
+    result = [(v, k) for k, v in zip(ambiguousSynset, scores.tolist())]
 
     if option in ["res", "resnik"]:  # lower score = more similar
-        result = sorted([(v, k) for k, v in result.items()])
-    else:  # higher score = more simila  r
-        result = sorted([(v, k) for k, v in result.items()], reverse=True)
+        result = heapq.nsmallest(n, result) if n else sorted(result)
+    else:  # higher score = more similar
+        result = heapq.nlargest(n, result) if n else sorted(result, reverse=True)
 
     return result[0][1] if best else result
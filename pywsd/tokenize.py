@@ -10,6 +10,8 @@ import re
 
 from nltk import sent_tokenize
 
+from pywsd.instrumentation import timed
+
 
 class MacIntyreContractions:
     """
@@ -135,6 +137,7 @@ class TreebankWordTokenizer:
 _treebank_word_tokenizer = TreebankWordTokenizer()
 
 
+@timed('word_tokenize')
 def word_tokenize(text, language='english', preserve_line=False):
     sentences = [text] if preserve_line else sent_tokenize(text, language)
     return [token for sent in sentences
@@ -4,11 +4,20 @@
 # Copyright (C) 2014-2020 alvations
 # For license information, see LICENSE.md
 
+import nltk
 from nltk.stem import PorterStemmer, WordNetLemmatizer
-from nltk import pos_tag
+from nltk.tag.perceptron import PerceptronTagger
 
+import atexit
+import os
 import re
+import sqlite3
+import warnings
+from functools import lru_cache
 
+from pywsd.instrumentation import timed
+from pywsd.lemma_cache import LemmaCache
+from pywsd.lexicon import get_wordnet_tag
 from pywsd.tokenize import word_tokenize
 
 SS_PARAMETERS_TYPE_MAP = {'definition': str,
@@ -76,18 +85,94 @@ def semcor_to_offset(sensekey):
 
 porter = PorterStemmer()
 wnl = WordNetLemmatizer()
+_pos_tagger = None
 
 
-def lemmatize(ambiguous_word: str, pos: str = None, neverstem=False,
-              lemmatizer=wnl, stemmer=porter) -> str:
+def get_pos_tagger() -> PerceptronTagger:
     """
-    Tries to convert a surface word into lemma, and if lemmatize word is not in
-    wordnet then try and convert surface word into its stem.
+    Returns the POS tagger of pyWSD, its model is only loaded the first time
+    a word is tagged (nltk.pos_tag() loads it again at every call).
+    """
+    global _pos_tagger
+    if _pos_tagger is None:
+        _pos_tagger = PerceptronTagger()
+    return _pos_tagger
 
-    This is to handle the case where users input a surface word as an ambiguous
-    word and the surface word is a not a lemma.
+
+@timed('pos_tag')
+def pos_tag(tokens: list) -> list:
+    """
+    Tags the tokens of a sentence like nltk.pos_tag().
+
+    :param tokens: List of str.
+    :return: List of tuple (token, Penn tag).
+    """
+    if isinstance(tokens, str):
+        raise TypeError('tokens: expected a list of strings, got a string')
+    return get_pos_tagger().tag(tokens)
+
+
+@timed('pos_tag_sents')
+def pos_tag_sents(sentences: list) -> list:
+    """
+    Tags the tokens of many sentences like nltk.pos_tag_sents(), each
+    sentence is tagged on its own.
+
+    :param sentences: List of list of str.
+    :return: List of list of tuple (token, Penn tag).
+    """
+    tagger = get_pos_tagger()
+    return [tagger.tag(tokens) for tokens in sentences]
+
+# In the cache directory of the user, the directory of pywsd may not be writable.
+lemma_cache_path = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                                'pywsd', 'lemmas.sqlite')
+LEMMA_CACHE_SIZE = 2 ** 16
+_lemma_cache = None
+_lemma_cache_failed = False
+
+
+def get_lemma_cache() -> LemmaCache:
+    """
+    Returns the lemmas computed by the previous runs with the same WordNet
+    and nltk, the file is opened the first time a word is lemmatized. None if
+    lemma_cache_path is None or the file can't be used.
     """
+    global _lemma_cache
+    if _lemma_cache is None and lemma_cache_path is not None and not _lemma_cache_failed:
+        lexicon = '{} nltk {}'.format(get_wordnet_tag(), nltk.__version__)
+        _lemma_cache = LemmaCache(lemma_cache_path, lexicon)
+        try:
+            _lemma_cache.connection
+        except (OSError, sqlite3.Error) as error:
+            _disable_lemma_cache(error)
+    return _lemma_cache
+
+
+def _disable_lemma_cache(error: Exception):
+    # Only the in-memory tier is left, the lemmas are computed again by the next runs.
+    global _lemma_cache, _lemma_cache_failed
+    warnings.warn('The lemma cache file {} is not used: {}'.format(lemma_cache_path, error))
+    _lemma_cache = None
+    _lemma_cache_failed = True
+
+
+def save_lemma_cache():
+    """ Writes the new lemmas to the lemma cache file. """
+    if _lemma_cache is not None:
+        try:
+            _lemma_cache.save()
+        except (OSError, sqlite3.Error) as error:
+            _disable_lemma_cache(error)
+
+
+# The new lemmas of the pool workers are saved by the harness after each
+# task, the workers exit without running the atexit functions.
+atexit.register(save_lemma_cache)
+
 
+def _lemmatize(ambiguous_word: str, pos: str = None, neverstem=False,
+               lemmatizer=wnl, stemmer=porter) -> str:
     # Try to be a little smarter and use most frequent POS.
     pos = pos if pos else penn2morphy(pos_tag([ambiguous_word])[0][1],
                                       default_to_noun=True)
@@ -105,6 +190,75 @@ def lemmatize(ambiguous_word: str, pos: str = None, neverstem=False,
         return lemma
 
 
+def _lookup_lemma(ambiguous_word: str, pos: str, neverstem: bool) -> str:
+    lemma_cache = get_lemma_cache()
+    key = (ambiguous_word, pos, neverstem)
+    try:
+        lemma = lemma_cache.get(key) if lemma_cache is not None else None
+    except (OSError, sqlite3.Error) as error:
+        _disable_lemma_cache(error)
+        lemma_cache = lemma = None
+    if lemma is None:
+        lemma = _lemmatize(ambiguous_word, pos, neverstem)
+        if lemma_cache is not None:
+            try:
+                lemma_cache.add(key, lemma)
+            except (OSError, sqlite3.Error) as error:
+                _disable_lemma_cache(error)
+    return lemma
+
+
+_cached_lemma = lru_cache(maxsize=LEMMA_CACHE_SIZE)(_lookup_lemma)
+
+
+@timed('lemmatize')
+def lemmatize(ambiguous_word: str, pos: str = None, neverstem=False,
+              lemmatizer=wnl, stemmer=porter) -> str:
+    """
+    Tries to convert a surface word into lemma, and if lemmatize word is not in
+    wordnet then try and convert surface word into its stem.
+
+    This is to handle the case where users input a surface word as an ambiguous
+    word and the surface word is a not a lemma.
+
+    With the default lemmatizer and stemmer, the lemmas are memoized: in a LRU
+    cache, then in the lemma cache file shared by the runs (see pywsd.lemma_cache).
+    """
+    if lemmatizer is wnl and stemmer is porter:
+        # A missing POS is tagged, whether it is None or ''.
+        return _cached_lemma(ambiguous_word, pos or '', bool(neverstem))
+    return _lemmatize(ambiguous_word, pos, neverstem, lemmatizer, stemmer)
+
+
+def lemma_cache_info():
+    """
+    Returns the hits, misses, maxsize and currsize of the in-memory tier of
+    the memoized lemmatize().
+    """
+    return _cached_lemma.cache_info()
+
+
+def clear_lemma_cache(disk=False):
+    """
+    Empties the in-memory tier of the memoized lemmatize().
+
+    :param disk: Boolean, whether to delete the lemma cache file as well.
+    """
+    _cached_lemma.cache_clear()
+    if disk and get_lemma_cache() is not None:
+        get_lemma_cache().clear()
+
+
+def set_lemma_cache_size(maxsize: int):
+    """
+    Replaces the in-memory tier of the memoized lemmatize() by an empty one.
+
+    :param maxsize: Integer, the number of lemmas kept, None for no bound.
+    """
+    global _cached_lemma
+    _cached_lemma = lru_cache(maxsize=maxsize)(_lookup_lemma)
+
+
 def penn2morphy(penntag, returnNone=False, default_to_noun=False) -> str:
     """
     Converts tags from Penn format (input: single string) to Morphy.
@@ -121,11 +275,10 @@ def penn2morphy(penntag, returnNone=False, default_to_noun=False) -> str:
             return ''
 
 
-def lemmatize_sentence(sentence: str, neverstem=False, keepWordPOS=False,
-                       tokenizer=word_tokenize, postagger=pos_tag,
-                       lemmatizer=wnl, stemmer=porter) -> list:
+def _lemmatize_tagged(tagged_words: list, neverstem=False, keepWordPOS=False,
+                      lemmatizer=wnl, stemmer=porter):
     words, lemmas, poss = [], [], []
-    for word, pos in postagger(tokenizer(sentence)):
+    for word, pos in tagged_words:
         pos = penn2morphy(pos)
         lemmas.append(lemmatize(word.lower(), pos, neverstem,
                                 lemmatizer, stemmer))
@@ -138,6 +291,29 @@ def lemmatize_sentence(sentence: str, neverstem=False, keepWordPOS=False,
     return lemmas
 
 
+@timed('lemmatize_sentence')
+def lemmatize_sentence(sentence: str, neverstem=False, keepWordPOS=False,
+                       tokenizer=word_tokenize, postagger=pos_tag,
+                       lemmatizer=wnl, stemmer=porter) -> list:
+    return _lemmatize_tagged(postagger(tokenizer(sentence)), neverstem, keepWordPOS, lemmatizer, stemmer)
+
+
+@timed('lemmatize_sentences')
+def lemmatize_sentences(sentences: list, neverstem=False, keepWordPOS=False,
+                        tokenizer=word_tokenize, postagger=pos_tag_sents,
+                        lemmatizer=wnl, stemmer=porter) -> list:
+    """
+    Returns the lemmatize_sentence() of many sentences, all of them are
+    tagged with one call of the postagger.
+
+    :param sentences: List of str.
+    :param postagger: Function tagging a list of tokenized sentences.
+    """
+    tagged_sentences = postagger([tokenizer(sentence) for sentence in sentences])
+    return [_lemmatize_tagged(tagged_words, neverstem, keepWordPOS, lemmatizer, stemmer)
+            for tagged_words in tagged_sentences]
+
+
 def synset_properties(synset: "wn.Synset", parameter: str):
     """
     Making from NLTK's WordNet Synset's properties to function.
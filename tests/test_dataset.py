@@ -0,0 +1,48 @@
+import os
+import pickle
+
+import pytest
+
+from dataset import Corpus, PackedCorpus, StreamedWord, Word, packCorpus
+
+HEADER = "% AA\n@RELATION AA\n\n@ATTRIBUTE text STRING\n@ATTRIBUTE class {1,2}\n\n@DATA\n"
+
+
+def writeFile(path: str, lines):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(HEADER + "".join(f"\"{line}\",{meaning}\n" for line, meaning in lines))
+    return path
+
+
+def testPackedCorpusKeepsFilesWithTheSameWord(tmp_path):
+    acronym = writeFile(str(tmp_path / "acronyms" / "AA_pmids_tagged.arff"), [("an <e>AA</e> acronym", 1)])
+    term = writeFile(str(tmp_path / "terms" / "AA_pmids_tagged.arff"), [("a first term", 2), ("a second term", 1)])
+    packedPath = str(tmp_path / "dataset.pack")
+    packCorpus([acronym, term], packedPath)
+
+    corpus = Corpus([acronym, term])
+    packedCorpus = PackedCorpus(packedPath)
+    assert len(packedCorpus) == len(corpus) == 2
+    for path in (acronym, term):
+        assert path in packedCorpus
+        assert [(e.sentence, e.meaning) for e in packedCorpus[path].examples] == \
+               [(e.sentence, e.meaning) for e in corpus[path].examples]
+    assert [word.path for word in packedCorpus.select(str(tmp_path / "acronyms"))] == [acronym]
+    assert pickle.loads(pickle.dumps(packedCorpus[term])).path == term
+    with pytest.raises(KeyError):
+        packedCorpus["AA"]
+
+
+@pytest.mark.parametrize("header", [HEADER[len("% AA\n"):], "% AA\n% AA\n" + HEADER])
+def testWordAndStreamedWordParseTheSameExamples(tmp_path, header):
+    path = str(tmp_path / "terms" / "AA_pmids_tagged.arff")
+    os.makedirs(os.path.dirname(path))
+    with open(path, "w") as file:
+        file.write(header + "\"a first term\",2\n\n\"a second term\",1\n")
+
+    word, streamedWord = Word(path), StreamedWord(path)
+    assert word.meaningNumber == streamedWord.meaningNumber == 2
+    examples = [(e.sentence, e.meaning) for e in word.examples]
+    assert examples == [(e.sentence, e.meaning) for e in streamedWord.examples]
+    assert [meaning for _, meaning in examples] == [2, 1]